@@ -2,11 +2,22 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import List, Dict, Any
+import asyncio
 import json
 import os
 from app.utils.config import get_settings
 from app.utils.logging_optimized import get_logger
 from app.services.token_storage import TokenStorage
+from app.services.embedding_cache import get_embedding_cache
+from app.services.embedding_executor import get_embedding_executor
+from app.services.embedding_workers import get_embedding_worker_stats
+from app.services.embedding_service_optimized import get_query_cache
+from app.services.model_registry import get_model_registry
+from app.services.parser_pool import get_parser_pool_stats
+from app.services.http_client import get_http_stats
+from app.services.manifest_service import get_manifest_service
+from app.utils.startup import get_startup_report
+from app.services.query_batcher import get_query_batcher_stats
 from datetime import datetime
 from app.api.ingest import active_jobs
 
@@ -149,3 +160,96 @@ async def list_jobs(tenant: str | None = None, admin_key: str = Depends(verify_a
     except Exception as e:
         logger.error(f"Error listing jobs: {e}")
         raise HTTPException(status_code=500, detail="Failed to list jobs")
+
+@router.get("/embedding-models")
+async def get_embedding_models(admin_key: str = Depends(verify_admin_key)):
+    """Loaded embedding models with load time and memory footprint"""
+    try:
+        return {"success": True, **get_model_registry().get_stats()}
+    except Exception as e:
+        logger.error(f"Error reading embedding model stats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read embedding model stats")
+
+@router.get("/embedding-stats")
+async def get_embedding_stats(admin_key: str = Depends(verify_admin_key)):
+    """Embedding pipeline metrics (caches, query batching, inference pool saturation)"""
+    try:
+        settings = get_settings()
+        if settings.embedding_cache_enabled:
+            # Opening the cache and counting its rows hits SQLite; keep it off the event loop
+            cache_stats = await asyncio.to_thread(lambda: get_embedding_cache().get_stats())
+            chunk_cache = {"enabled": True, **cache_stats}
+        else:
+            chunk_cache = {"enabled": False}
+        return {
+            "success": True,
+            "query_cache": get_query_cache().get_stats(),
+            "chunk_cache": chunk_cache,
+            "executor": get_embedding_executor().get_stats(),
+            "ingest_workers": get_embedding_worker_stats(),
+            "query_batchers": get_query_batcher_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error reading embedding stats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read embedding stats")
+
+@router.get("/startup-report")
+async def startup_report(admin_key: str = Depends(verify_admin_key)):
+    """Startup phase timings and lazily imported engines"""
+    try:
+        return {
+            "success": True,
+            **get_startup_report()
+        }
+    except Exception as e:
+        logger.error(f"Error reading startup report: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read startup report")
+
+@router.get("/parser-stats")
+async def get_parser_stats(admin_key: str = Depends(verify_admin_key)):
+    """Parser pool metrics (workers, crashes, timeouts, restarts)"""
+    try:
+        return {
+            "success": True,
+            "parser_pool": get_parser_pool_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error reading parser stats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read parser stats")
+
+@router.get("/manifest-stats")
+async def get_manifest_stats(admin_key: str = Depends(verify_admin_key)):
+    """Incremental re-ingest manifest (documents recorded per tenant)"""
+    try:
+        return {
+            "success": True,
+            "manifest": get_manifest_service().get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error reading manifest stats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read manifest stats")
+
+@router.get("/http-stats")
+async def get_http_client_stats(admin_key: str = Depends(verify_admin_key)):
+    """Shared HTTP client metrics (connections opened, reuse ratio, protocol, latency)"""
+    try:
+        return {
+            "success": True,
+            "http_client": get_http_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error reading HTTP client stats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read HTTP client stats")
+
+@router.post("/query-cache/clear")
+async def clear_query_cache(admin_key: str = Depends(verify_admin_key)):
+    """Drop all cached query embeddings (e.g. after changing the embedding model)"""
+    try:
+        cache = get_query_cache()
+        cleared = cache.get_stats()["size"]
+        cache.clear()
+        logger.info(f"Cleared {cleared} cached query embeddings")
+        return {"success": True, "cleared": cleared}
+    except Exception as e:
+        logger.error(f"Error clearing query cache: {e}")
+        raise HTTPException(status_code=500, detail="Failed to clear query cache")
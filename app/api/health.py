@@ -6,7 +6,7 @@ import os
 import json
 from app.models.auth import HealthCheck, DetailedHealthCheck
 from app.services.qdrant_service import QdrantService
-from app.services.embedding_service_optimized import EmbeddingService
+from app.services.model_registry import get_model_registry
 from app.utils.config import get_settings
 from app.utils.logging_optimized import get_logger
 
@@ -53,10 +53,9 @@ async def detailed_health_check():
     except Exception:
         qdrant_status = "unhealthy"
     
-    # Check embedding model
+    # Check embedding model (registry lookup only, never triggers a model load)
     try:
-        embedding_service = EmbeddingService()
-        embedding_status = "healthy" if embedding_service.model is not None else "unhealthy"
+        embedding_status = "healthy" if get_model_registry().is_loaded() else "unhealthy"
     except Exception:
         embedding_status = "unhealthy"
     
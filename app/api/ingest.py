@@ -5,18 +5,24 @@ Ingest API Router - Updated for centralized OAuth connections
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from typing import Dict, Any
 import asyncio
-from datetime import datetime
+from datetime import datetime, timezone
 from app.models.ingest import (
     IngestRequest, IngestResponse, JobProgress, 
     CollectionInitRequest, CollectionInitResponse
 )
+from app.models.query import DocumentMetadata
 from app.services.google_drive_service import GoogleDriveService
-from app.services.parser_service_optimized import ParserService
+from app.services.parser_service_optimized import PARSER_VERSION, ParserService
+from app.services.parser_pool import iter_document_pages
 from app.services.embedding_service_optimized import EmbeddingService
+from app.services.model_registry import get_model_registry
 from app.services.qdrant_service import QdrantService
 from app.services.job_service import JobService
+from app.services.manifest_service import get_manifest_service, listed_drive_path, parse_drive_time
 from app.services.token_storage import TokenStorage
+from app.utils.config import get_settings
 from app.utils.logging_optimized import get_logger, log_error, log_ingest_progress
+from app.utils.metrics import StageTimer
 from app.utils.security import generate_job_id, validate_tenant_name
 
 router = APIRouter()
@@ -112,9 +118,9 @@ async def init_collection(request: CollectionInitRequest):
         if not validate_tenant_name(request.tenant):
             raise HTTPException(status_code=400, detail="Invalid tenant name")
         
-        # Create collection
+        # Create collection sized for the configured embedding model
         qdrant_service = QdrantService()
-        success = qdrant_service.create_collection(request.tenant)
+        success = qdrant_service.create_collection(request.tenant, get_model_registry().get_dimension())
         
         if success:
             collection_name = f"sp_{request.tenant}"
@@ -139,6 +145,7 @@ async def process_ingest_job(job_id: str, request: IngestRequest):
         active_jobs[job_id].status = "running"
         
         # Initialize services
+        settings = get_settings()
         drive_service = GoogleDriveService()
         parser_service = ParserService()
         embedding_service = EmbeddingService()
@@ -150,90 +157,163 @@ async def process_ingest_job(job_id: str, request: IngestRequest):
         if not connection:
             raise Exception("Connection not found or inactive")
         
-        # Ensure collection exists
-        if not qdrant_service.create_collection(request.tenant):
-            raise Exception("Failed to create Qdrant collection")
+        # Ensure collection exists and matches the embedding model's vector size
+        if not qdrant_service.create_collection(request.tenant, embedding_service.get_embedding_dimension()):
+            raise Exception("Failed to create Qdrant collection (or vector size mismatch)")
         
-        # List files from Google Drive using connection
-        all_files = []
-        for folder_id in request.drive.folder_ids:
-            files = await drive_service.list_drive_files(request.connection_id, folder_id)
-            all_files.extend(files)
+        # What each file looked like when it was last ingested, for incremental re-ingest
+        manifest = get_manifest_service()
+        manifest_records = await asyncio.to_thread(manifest.load_tenant, request.tenant)
+        embedding_model = embedding_service.model_name
         
-        active_jobs[job_id].total_docs = len(all_files)
+        logger.info(f"Crawling {len(request.drive.folder_ids)} folders for tenant {request.tenant} "
+                    f"({len(manifest_records)} files in manifest, reingest={request.reingest})")
+        job_timer = StageTimer()
         
-        logger.info(f"Processing {len(all_files)} files for tenant {request.tenant}")
+        async def record_document(file, filename, mime_type, sha256, pages, chunks):
+            """Record what was ingested for a file in the tenant's manifest"""
+            metadata = DocumentMetadata(
+                doc_id=file['id'],
+                title=filename,
+                mime_type=mime_type,
+                sha256=sha256,
+                modified_at=parse_drive_time(file.get('modified_time')) or datetime.now(timezone.utc),
+                drive_path=listed_drive_path(file),
+                page_count=pages,
+                chunk_count=chunks,
+                md5_checksum=file.get('md5_checksum'),
+                parser_version=PARSER_VERSION,
+                embedding_model=embedding_model
+            )
+            await asyncio.to_thread(manifest.put, request.tenant, metadata)
+        
+        async def relocate_document(record, file, timer):
+            """Point an unchanged file's chunks and manifest record at its new name and path"""
+            location = {'title': file['name'], 'drive_path': listed_drive_path(file)}
+            with timer.stage("upsert"):
+                if not qdrant_service.update_document_payload(request.tenant, file['id'], location):
+                    raise Exception("Failed to update the renamed file's chunks")
+            await asyncio.to_thread(manifest.put, request.tenant, record.model_copy(update=location))
+            logger.info(f"Updated name/path of unchanged file {file['name']} without re-embedding")
         
-        # Process files concurrently (batch processing)
-        import asyncio
-        from concurrent.futures import ThreadPoolExecutor
+        def skipped(file, timer):
+            """Result for a file left as it is"""
+            return {
+                'success': True,
+                'skipped': True,
+                'filename': file.get('name', 'unknown'),
+                'pages': 0,
+                'chunks': 0,
+                'timings': timer.as_dict()
+            }
         
         async def process_single_file(file):
             """Process a single file"""
+            timer = StageTimer()
+            download = None
             try:
-                # Check if file needs processing
-                if request.reingest == "incremental":
-                    # TODO: Check against existing SHA256 in database
-                    pass
+                # Unchanged files (same Drive checksum, parser and model) are skipped before download
+                record = manifest_records.get(file['id'])
+                # A renamed or moved file keeps its content, so only its stored name and path change
+                if request.reingest == "incremental" and manifest.is_unchanged(record, file, PARSER_VERSION, embedding_model):
+                    if manifest.is_relocated(record, file):
+                        await relocate_document(record, file, timer)
+                    return skipped(file, timer)
                 
-                # Download file
-                content, filename = await drive_service.download_file(request.connection_id, file['id'])
+                # Stream the download (the crawl's listing record already has the name and type);
+                # it is hashed as it arrives and large files land in a temp file the parser opens by path
+                with timer.stage("download"):
+                    download = await drive_service.stream_download(request.connection_id, file['id'], file)
+                filename = download.filename
+                mime_type = drive_service.get_content_mime_type(file['mime_type'])
                 
-                # Parse document (synchronous call)
-                parsed_doc = parser_service.parse_document(content, file['mime_type'], filename)
+                # Same bytes under a new modified time (e.g. an exported Google Doc that was only opened)
+                if (request.reingest == "incremental" and manifest.is_current(record, PARSER_VERSION, embedding_model)
+                        and record.sha256 == download.sha256):
+                    if manifest.is_relocated(record, file):
+                        await relocate_document(record, file, timer)
+                    await record_document(file, filename, mime_type, download.sha256, record.page_count, record.chunk_count)
+                    return skipped(file, timer)
                 
-                # Generate chunks
-                chunks = parser_service.chunk_document(parsed_doc)
-                logger.info(f"Generated {len(chunks)} chunks for {filename}")
+                # Stream pages from the parser pool (off the event loop) and chunk, embed and
+                # upsert a window at a time, so memory scales with the window, not the document
+                file_sha256 = download.sha256
+                total_pages = 0
+                total_chunks = 0
+                window = []
+                upserted_ids = []
                 
-                # Debug chunk content
-                for i, chunk in enumerate(chunks):
-                    logger.info(f"Chunk {i+1}: text_length={len(chunk.get('text', ''))}")
-                    if chunk.get('text'):
-                        logger.info(f"Chunk {i+1} sample: {chunk['text'][:100]}...")
+                async def flush(chunks):
+                    """Embed and upsert one window of chunks"""
+                    # Debug chunk content
+                    for chunk in chunks:
+                        logger.info(f"Chunk {chunk['chunk_idx'] + 1}: text_length={len(chunk.get('text', ''))}")
+                        if chunk.get('text'):
+                            logger.info(f"Chunk {chunk['chunk_idx'] + 1} sample: {chunk['text'][:100]}...")
+                    
+                    # Generate embeddings as one (n, dim) float32 matrix; row i belongs to chunks[i]
+                    texts = [chunk["text"] for chunk in chunks]
+                    with timer.stage("embed"):
+                        embeddings = await embedding_service.generate_embedding_matrix(texts)
+                    
+                    # Upsert to Qdrant
+                    logger.info(f"Attempting to upsert {len(chunks)} chunks for tenant {request.tenant}")
+                    try:
+                        with timer.stage("upsert"):
+                            result = qdrant_service.upsert_chunk_matrix(request.tenant, chunks, embeddings)
+                        if not result:
+                            logger.error(f"Qdrant upsert returned False for {len(chunks)} chunks")
+                            raise Exception("Failed to upsert chunks to Qdrant")
+                        logger.info(f"Successfully upserted {len(chunks)} chunks")
+                    except Exception as e:
+                        logger.error(f"Qdrant upsert exception: {e}")
+                        raise Exception(f"Failed to upsert chunks to Qdrant: {e}")
+                    upserted_ids.extend(qdrant_service.point_ids(chunks))
                 
-                if not chunks:
-                    logger.warning(f"No chunks generated for {filename} - skipping Qdrant upsert")
-                    return {
-                        'success': True,
-                        'filename': filename,
-                        'pages': parsed_doc.total_pages,
-                        'chunks': 0
-                    }
+                async for page in iter_document_pages(download.content, mime_type, filename):
+                    total_pages += 1
+                    # Extract, render and OCR ran in the parser pool and are timed per page
+                    timer.merge(page.timings)
+                    with timer.stage("chunk"):
+                        for chunk in parser_service.chunk_pages([page], file['id'], filename, mime_type):
+                            # Add document metadata to chunks (chunk_idx runs across the whole document)
+                            chunk["tenant"] = request.tenant
+                            chunk["drive_path"] = listed_drive_path(file)
+                            chunk["sha256"] = file_sha256
+                            chunk["chunk_idx"] = total_chunks + len(window)
+                            window.append(chunk)
+                    
+                    if len(window) >= settings.ingest_chunk_window:
+                        await flush(window)
+                        total_chunks += len(window)
+                        window = []
                 
-                # Generate embeddings
-                texts = [chunk["text"] for chunk in chunks]
-                embeddings = await embedding_service.generate_embeddings(texts)
+                if window:
+                    await flush(window)
+                    total_chunks += len(window)
                 
-                # Add embeddings to chunks
-                for i, chunk in enumerate(chunks):
-                    chunk["embedding"] = embeddings[i]
-                    chunk["tenant"] = request.tenant
-                    chunk["drive_path"] = file.get('web_view_link', f"/{filename}")
-                    chunk["sha256"] = drive_service.get_file_sha256(content)
-                    chunk["doc_id"] = file['id']
-                    chunk["title"] = filename
-                    chunk["mime_type"] = file['mime_type']
-                    chunk["page"] = chunk.get("page", 1)
-                    chunk["chunk_idx"] = i
+                if not total_chunks:
+                    logger.warning(f"No chunks generated for {filename} - skipping Qdrant upsert")
+                else:
+                    logger.info(f"Generated {total_chunks} chunks for {filename}")
                 
-                # Upsert to Qdrant
-                logger.info(f"Attempting to upsert {len(chunks)} chunks for tenant {request.tenant}")
-                try:
-                    result = qdrant_service.upsert_chunks(request.tenant, chunks)
-                    if not result:
-                        logger.error(f"Qdrant upsert returned False for {len(chunks)} chunks")
-                        raise Exception("Failed to upsert chunks to Qdrant")
-                    logger.info(f"Successfully upserted {len(chunks)} chunks")
-                except Exception as e:
-                    logger.error(f"Qdrant upsert exception: {e}")
-                    raise Exception(f"Failed to upsert chunks to Qdrant: {e}")
+                # The previous version's chunks are removed only once the new one is fully upserted,
+                # so a failed run leaves the document searchable under its old chunks. This runs even
+                # without a manifest record: chunks may predate the manifest or outlive a wiped one
+                with timer.stage("upsert"):
+                    if not qdrant_service.delete_stale_chunks(request.tenant, file['id'], upserted_ids):
+                        raise Exception("Failed to delete the previous version's chunks")
                 
+                await record_document(file, filename, mime_type, file_sha256, total_pages, total_chunks)
+                
+                timings = timer.as_dict()
+                logger.info(f"Stage timings for {filename} (tenant {request.tenant}): {timings}")
                 return {
                     'success': True,
                     'filename': filename,
-                    'pages': parsed_doc.total_pages,
-                    'chunks': len(chunks)
+                    'pages': total_pages,
+                    'chunks': total_chunks,
+                    'timings': timings
                 }
                 
             except Exception as e:
@@ -242,39 +322,70 @@ async def process_ingest_job(job_id: str, request: IngestRequest):
                 return {
                     'success': False,
                     'filename': file.get('name', 'unknown'),
-                    'error': error_msg
+                    'error': error_msg,
+                    'timings': timer.as_dict()
                 }
+            finally:
+                if download is not None:
+                    download.cleanup()
         
-        # Process files in batches of 5 concurrently
-        batch_size = 5
-        for i in range(0, len(all_files), batch_size):
-            batch = all_files[i:i + batch_size]
-            logger.info(f"Processing batch {i//batch_size + 1}: {len(batch)} files")
-            
-            # Process batch concurrently
-            results = await asyncio.gather(*[process_single_file(file) for file in batch])
-            
-            # Update progress for successful files
-            for result in results:
-                if result['success']:
-                    active_jobs[job_id].processed_docs += 1
-                    active_jobs[job_id].processed_pages += result['pages']
-                    
-                    log_ingest_progress(
-                        job_id, request.tenant,
-                        active_jobs[job_id].processed_docs,
-                        active_jobs[job_id].total_docs,
-                        active_jobs[job_id].processed_pages,
-                        active_jobs[job_id].total_pages
-                    )
-                else:
-                    active_jobs[job_id].errors.append(result['error'])
+        def record_result(result):
+            """Fold one file's result into the job progress"""
+            job_timer.merge(result['timings'])
+            if result.get('skipped'):
+                active_jobs[job_id].skipped_docs += 1
+            elif result['success']:
+                active_jobs[job_id].processed_docs += 1
+                active_jobs[job_id].processed_pages += result['pages']
+                
+                log_ingest_progress(
+                    job_id, request.tenant,
+                    active_jobs[job_id].processed_docs,
+                    active_jobs[job_id].total_docs,
+                    active_jobs[job_id].processed_pages,
+                    active_jobs[job_id].total_pages
+                )
+            else:
+                active_jobs[job_id].errors.append(result['error'])
+            active_jobs[job_id].stage_timings = job_timer.as_dict()
+        
+        # Files stream from the Drive crawl into a bounded queue, so downloads start while
+        # enumeration of large folder trees is still running
+        concurrency = max(settings.ingest_file_concurrency, 1)
+        file_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        
+        async def produce():
+            """Crawl the requested folders and queue every file found"""
+            try:
+                async for file in drive_service.crawl_drive_files(request.connection_id, request.drive.folder_ids):
+                    active_jobs[job_id].total_docs += 1
+                    await file_queue.put(file)
+                logger.info(f"Found {active_jobs[job_id].total_docs} files for tenant {request.tenant}")
+            finally:
+                for _ in range(concurrency):
+                    await file_queue.put(None)
+        
+        async def consume():
+            """Process queued files until the crawl is done"""
+            while True:
+                file = await file_queue.get()
+                if file is None:
+                    return
+                record_result(await process_single_file(file))
+        
+        producer = asyncio.create_task(produce())
+        await asyncio.gather(*[consume() for _ in range(concurrency)])
+        # Surface a failed crawl after the files it did find are processed
+        await producer
         
         # Mark job as completed
         active_jobs[job_id].status = "completed"
         active_jobs[job_id].completed_at = datetime.utcnow()
         
-        logger.info(f"Completed ingest job {job_id} for tenant {request.tenant}")
+        logger.info(
+            f"Completed ingest job {job_id} for tenant {request.tenant}: {active_jobs[job_id].processed_docs} processed, "
+            f"{active_jobs[job_id].skipped_docs} unchanged (stage timings: {job_timer.as_dict()})"
+        )
         
     except Exception as e:
         # Mark job as failed
@@ -3,14 +3,24 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import uvicorn
+import asyncio
 import os
 from dotenv import load_dotenv
 import json
+from contextlib import asynccontextmanager
 from loguru import logger
 
 from app.api import ingest, health, admin, oauth, search
+from app.services.embedding_cache import get_embedding_cache
+from app.services.embedding_executor import shutdown_embedding_executor
+from app.services.embedding_workers import shutdown_embedding_worker_pool
+from app.services.http_client import close_http_client, get_http_client
+from app.services.model_registry import get_model_registry, resolve_model_name
+from app.services.parser_pool import get_parser_pool, shutdown_parser_pool
+from app.services.query_batcher import close_query_batchers
 from app.utils.config import get_settings
 from app.utils.logging_optimized import setup_logging
+from app.utils.startup import mark_ready, process_age_seconds, record_phase, startup_phase
 from app.middleware.ip_whitelist import IPWhitelistMiddleware
 
 # Load environment variables
@@ -22,12 +32,54 @@ settings = get_settings()
 # Setup logging
 setup_logging()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load shared resources once at startup and release them on shutdown"""
+    record_phase("interpreter_and_imports", process_age_seconds())
+
+    # Load embedding models once so search and ingest never pay the ONNX load per request
+    with startup_phase("embedding_model_preload"):
+        try:
+            get_model_registry().preload([resolve_model_name()])
+        except Exception as e:
+            logger.error(f"Embedding model preload failed, will retry on first use: {e}")
+
+    # Open (and create) the chunk embedding cache database off the event loop
+    if settings.embedding_cache_enabled:
+        with startup_phase("embedding_cache_open"):
+            try:
+                await asyncio.to_thread(get_embedding_cache)
+            except Exception as e:
+                logger.error(f"Embedding cache open failed, will retry on first use: {e}")
+
+    # Parser engines load lazily per format; pre-warm mode starts the workers in the background
+    parser_pool = get_parser_pool() if settings.parser_prewarm else None
+    prewarm_task = asyncio.create_task(parser_pool.prewarm()) if parser_pool is not None else None
+
+    # One pooled client for every Google Drive/OAuth call, kept alive for the process
+    get_http_client()
+
+    mark_ready()
+
+    yield
+
+    if prewarm_task is not None and not prewarm_task.done():
+        prewarm_task.cancel()
+
+    await close_query_batchers()
+    await close_http_client()
+    shutdown_embedding_executor()
+    shutdown_embedding_worker_pool()
+    shutdown_parser_pool()
+    get_model_registry().clear()
+
 app = FastAPI(
     title="Document Ingest Service",
     description="Document processing and ingestion service for Google Drive documents",
     version="1.0.0",
     docs_url=None,  # Disable public docs
-    redoc_url=None  # Disable public redoc
+    redoc_url=None,  # Disable public redoc
+    lifespan=lifespan
 )
 
 # Security middleware
@@ -51,10 +51,12 @@ class JobProgress(BaseModel):
     started_at: datetime = Field(..., description="Job start time")
     completed_at: Optional[datetime] = Field(None, description="Job completion time")
     processed_docs: int = Field(default=0, description="Number of documents processed")
+    skipped_docs: int = Field(default=0, description="Number of unchanged documents skipped by incremental re-ingest")
     processed_pages: int = Field(default=0, description="Number of pages processed")
     total_docs: int = Field(default=0, description="Total documents to process")
     total_pages: int = Field(default=0, description="Total pages to process")
     errors: List[str] = Field(default=[], description="List of errors encountered")
+    stage_timings: Dict[str, float] = Field(default={}, description="Seconds spent per ingest stage, summed over documents")
     
     class Config:
         json_schema_extra = {
@@ -63,10 +65,12 @@ class JobProgress(BaseModel):
                 "status": "running",
                 "started_at": "2024-01-01T10:00:00Z",
                 "processed_docs": 5,
+                "skipped_docs": 120,
                 "processed_pages": 25,
                 "total_docs": 10,
                 "total_pages": 50,
-                "errors": []
+                "errors": [],
+                "stage_timings": {"download": 4.2, "extract": 1.8, "render": 3.1, "ocr": 22.5, "chunk": 0.4, "embed": 9.7, "upsert": 1.2}
             }
         }
 
@@ -12,6 +12,10 @@ class DocumentMetadata(BaseModel):
     drive_path: str = Field(..., description="Google Drive path")
     page_count: int = Field(default=0, description="Number of pages")
     chunk_count: int = Field(default=0, description="Number of chunks")
+    md5_checksum: Optional[str] = Field(None, description="Drive md5Checksum (absent for Google Docs)")
+    parser_version: str = Field(..., description="Parser version the chunks were produced with")
+    embedding_model: str = Field(..., description="Embedding model the chunks were embedded with")
+    ingested_at: Optional[datetime] = Field(None, description="When the document was last ingested")
 
 class ChunkData(BaseModel):
     """Chunk data model for vector storage"""
@@ -44,6 +48,7 @@ class ParsedPage(BaseModel):
     has_text: bool = Field(..., description="Whether page has extractable text")
     needs_ocr: bool = Field(default=False, description="Whether OCR was needed")
     confidence: Optional[float] = Field(None, description="OCR confidence score")
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent on this page per stage (extract, render, ocr)")
 
 class ParsedDocument(BaseModel):
     """Parsed document model"""
@@ -53,3 +58,4 @@ class ParsedDocument(BaseModel):
     pages: List[ParsedPage] = Field(..., description="List of parsed pages")
     total_pages: int = Field(..., description="Total number of pages")
     processing_time: float = Field(..., description="Processing time in seconds")
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent per stage, summed over pages")
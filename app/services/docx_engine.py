@@ -0,0 +1,134 @@
+"""
+Native DOCX Engine - Streams paragraphs and tables straight out of the package zip
+Lightweight alternative to unstructured's partition_docx (stdlib zipfile + iterparse)
+"""
+
+import io
+import zipfile
+from contextlib import contextmanager
+from typing import IO, Iterator, List, Optional, Union
+from xml.etree.ElementTree import iterparse
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCUMENT_PART = "word/document.xml"
+
+# Raw markup that signals real page boundaries are recorded in the document
+PAGE_MARKERS = [b"lastRenderedPageBreak", b'w:type="page"', b"pageBreakBefore"]
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+# Sentinel yielded by iter_docx_blocks at each page or section break
+PAGE_BREAK = None
+
+@contextmanager
+def _open_document_part(source: Union[bytes, str]) -> Iterator[IO[bytes]]:
+    """Open word/document.xml inside a DOCX given as bytes or a file path"""
+    with zipfile.ZipFile(source if isinstance(source, str) else io.BytesIO(source)) as archive:
+        with archive.open(DOCUMENT_PART) as part:
+            yield part
+
+def has_page_markers(source: Union[bytes, str]) -> bool:
+    """Whether the document records page or section breaks (scanned without parsing the XML)"""
+    section_breaks = 0
+    tail = b""
+    with _open_document_part(source) as part:
+        while True:
+            block = part.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            window = tail + block
+            if any(marker in window for marker in PAGE_MARKERS):
+                return True
+            section_breaks += block.count(b"<w:sectPr")
+            # The body's own sectPr is always present; any other one is a section break
+            if section_breaks > 1:
+                return True
+            tail = window[-64:]
+    return False
+
+def _is_on(element) -> bool:
+    """OOXML boolean property (present and not switched off)"""
+    return element is not None and element.get(f"{W}val") not in ("0", "false", "off")
+
+def _paragraph_segments(paragraph) -> List[Optional[str]]:
+    """Split a paragraph into text segments separated by PAGE_BREAK markers"""
+    segments: List[Optional[str]] = []
+    parts: List[str] = []
+
+    properties = paragraph.find(f"{W}pPr")
+    if properties is not None and _is_on(properties.find(f"{W}pageBreakBefore")):
+        segments.append(PAGE_BREAK)
+
+    for element in paragraph.iter():
+        tag = element.tag
+        if tag == f"{W}t":
+            parts.append(element.text or "")
+        elif tag == f"{W}tab":
+            parts.append("\t")
+        elif tag == f"{W}cr":
+            parts.append("\n")
+        elif tag == f"{W}br":
+            if element.get(f"{W}type") == "page":
+                segments.extend(["".join(parts), PAGE_BREAK])
+                parts = []
+            else:
+                parts.append("\n")
+        elif tag == f"{W}lastRenderedPageBreak":
+            segments.extend(["".join(parts), PAGE_BREAK])
+            parts = []
+    segments.append("".join(parts))
+
+    # A section break stored on the paragraph starts a new page unless it is continuous
+    if properties is not None:
+        section = properties.find(f"{W}sectPr")
+        if section is not None:
+            section_type = section.find(f"{W}type")
+            if section_type is None or section_type.get(f"{W}val") != "continuous":
+                segments.append(PAGE_BREAK)
+
+    return [segment for segment in segments if segment is PAGE_BREAK or segment.strip()]
+
+def iter_docx_blocks(source: Union[bytes, str]) -> Iterator[Optional[str]]:
+    """Yield paragraph and table-row texts in document order, and PAGE_BREAK at each break"""
+    table_depth = 0
+    rows: List[List[str]] = []  # Cells of the current row, per open table
+    cell_parts: List[List[str]] = []  # Paragraphs of the current cell, per open table
+
+    with _open_document_part(source) as part:
+        for event, element in iterparse(part, events=("start", "end")):
+            tag = element.tag
+
+            if event == "start":
+                if tag == f"{W}tbl":
+                    table_depth += 1
+                    rows.append([])
+                    cell_parts.append([])
+                continue
+
+            if tag == f"{W}p":
+                segments = _paragraph_segments(element)
+                if table_depth:
+                    # Breaks inside tables are ignored; the row is emitted as one block
+                    cell_parts[-1].extend(segment.strip() for segment in segments if segment is not PAGE_BREAK)
+                else:
+                    for segment in segments:
+                        yield segment if segment is PAGE_BREAK else segment.strip()
+                element.clear()
+            elif tag == f"{W}tc" and table_depth:
+                rows[-1].append(" ".join(cell_parts[-1]))
+                cell_parts[-1] = []
+            elif tag == f"{W}tr" and table_depth:
+                cells = [cell for cell in rows[-1] if cell]
+                rows[-1] = []
+                if cells:
+                    row_text = " | ".join(cells)
+                    if table_depth == 1:
+                        yield row_text
+                    else:
+                        # Nested table rows belong to the enclosing cell
+                        cell_parts[-2].append(row_text)
+                element.clear()
+            elif tag == f"{W}tbl":
+                table_depth -= 1
+                rows.pop()
+                cell_parts.pop()
+                element.clear()
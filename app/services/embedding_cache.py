@@ -0,0 +1,199 @@
+"""
+Embedding Cache - Content-addressed persistent cache of chunk embeddings
+SQLite-backed, keyed by a hash of (model, chunk text), with LRU eviction
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.utils.config import get_settings
+from app.utils.logging_optimized import get_logger
+
+logger = get_logger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_BATCH_SIZE = 500
+
+# The entry count is kept in memory; recount this often in case other processes share the file
+COUNT_RESYNC_SECONDS = 300
+
+class EmbeddingCache:
+    """Disk-backed embedding cache so unchanged chunks skip inference on re-ingest"""
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.settings = get_settings()
+        self.db_path = db_path or self.settings.embedding_cache_path
+        self.max_entries = max_entries or self.settings.embedding_cache_max_entries
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._entries = 0
+        self._counted_at = 0.0
+
+        self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection (one per call, safe across executor threads)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def init_database(self):
+        """Initialize SQLite database with the embeddings table"""
+        try:
+            conn = self._connect()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used_at INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used_at)")
+            conn.commit()
+            self._recount(conn)
+            conn.close()
+            logger.info(f"Embedding cache initialized at {self.db_path}")
+        except Exception as e:
+            logger.error(f"Failed to initialize embedding cache: {e}")
+            raise
+
+    def _recount(self, conn: sqlite3.Connection):
+        """Resynchronize the in-memory entry count with the table (a full scan)"""
+        entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        with self._lock:
+            self._entries = entries
+            self._counted_at = time.monotonic()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Content address for a chunk embedding"""
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[int, np.ndarray]:
+        """Look up cached vectors, returning {index in texts: vector} for hits"""
+        keys = [self.make_key(model, text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        conn = self._connect()
+        try:
+            unique_keys = list(dict.fromkeys(keys))
+            for i in range(0, len(unique_keys), LOOKUP_BATCH_SIZE):
+                batch = unique_keys[i:i + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                cursor = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                )
+                for key, blob in cursor:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+            # Touch hits so eviction keeps recently used chunks
+            if found:
+                now = int(time.time())
+                conn.executemany(
+                    "UPDATE embeddings SET last_used_at = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                conn.commit()
+        finally:
+            conn.close()
+
+        hits = {i: found[key] for i, key in enumerate(keys) if key in found}
+        with self._lock:
+            self.hits += len(hits)
+            self.misses += len(texts) - len(hits)
+        return hits
+
+    def put_many(self, model: str, texts: List[str], vectors: List) -> None:
+        """Store vectors for texts and evict the least recently used entries over the cap"""
+        if not texts:
+            return
+
+        now = int(time.time())
+        rows = []
+        for text, vector in zip(texts, vectors):
+            array = np.asarray(vector, dtype=np.float32)
+            rows.append((self.make_key(model, text), model, int(array.shape[-1]), array.tobytes(), now))
+
+        conn = self._connect()
+        try:
+            # Keys address (model, text), so an existing row already holds the same vector
+            inserted = conn.executemany("""
+                INSERT OR IGNORE INTO embeddings (key, model, dim, vector, last_used_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows).rowcount
+
+            if time.monotonic() - self._counted_at > COUNT_RESYNC_SECONDS:
+                self._recount(conn)
+            else:
+                with self._lock:
+                    self._entries += inserted
+
+            evicted = 0
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                evicted = conn.execute("""
+                    DELETE FROM embeddings WHERE key IN (
+                        SELECT key FROM embeddings ORDER BY last_used_at ASC LIMIT ?
+                    )
+                """, (overflow,)).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.stores += inserted
+            self._entries -= evicted
+            self.evictions += evicted
+
+    def clear(self):
+        """Drop every cached embedding"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._entries = 0
+
+    def get_stats(self) -> Dict:
+        """Get entry count and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.db_path,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions
+            }
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide chunk embedding cache (opens the database on first use)"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
@@ -0,0 +1,133 @@
+"""
+Embedding Executor - Runs CPU-bound model inference off the event loop
+Bounded thread pool with backpressure and saturation metrics
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.config import get_settings
+from app.utils.logging_optimized import get_logger
+from app.utils.metrics import Histogram
+
+logger = get_logger(__name__)
+
+# Histogram buckets in milliseconds
+QUEUE_WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+RUN_TIME_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 5000, 30000]
+
+class EmbeddingExecutor:
+    """Thread pool for model.embed calls with a bounded submission queue"""
+
+    def __init__(self, max_workers: int, queue_depth: int):
+        self.max_workers = max(max_workers, 1)
+        self.queue_depth = max(queue_depth, self.max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="embedding"
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.run_time_ms = Histogram(RUN_TIME_BUCKETS_MS)
+        self.tasks_total = 0
+        self.errors_total = 0
+        self.saturated_total = 0
+        self.in_flight = 0
+        self.active = 0
+        self.waiting = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the queue-depth semaphore for the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.queue_depth)
+        return self._semaphore
+
+    def _timed(self, fn: Callable, submitted: float, *args) -> Any:
+        """Run fn on a worker thread, recording queue wait and run time"""
+        started = time.perf_counter()
+        self.queue_wait_ms.observe((started - submitted) * 1000.0)
+        with self._lock:
+            self.active += 1
+        try:
+            return fn(*args)
+        finally:
+            self.run_time_ms.observe((time.perf_counter() - started) * 1000.0)
+            with self._lock:
+                self.active -= 1
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run a blocking callable on the pool, waiting for a slot if the queue is full"""
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            # Queue is full: the caller is held back until a slot frees up
+            self.saturated_total += 1
+
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.tasks_total += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, fn, time.perf_counter(), *args)
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def shutdown(self):
+        """Stop accepting work and wait for running inference to finish"""
+        self._executor.shutdown(wait=True)
+
+    def get_stats(self) -> Dict:
+        """Get pool utilisation, saturation counters and timing histograms"""
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "active": self.active,
+            "queued": max(self.in_flight - self.active, 0),
+            "waiting_for_slot": self.waiting,
+            "saturated": self.in_flight >= self.queue_depth,
+            "saturated_total": self.saturated_total,
+            "tasks_total": self.tasks_total,
+            "errors_total": self.errors_total,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "run_time_ms": self.run_time_ms.snapshot()
+        }
+
+_embedding_executor: Optional[EmbeddingExecutor] = None
+
+def get_embedding_executor() -> EmbeddingExecutor:
+    """Get the process-wide embedding executor"""
+    global _embedding_executor
+    if _embedding_executor is None:
+        settings = get_settings()
+        _embedding_executor = EmbeddingExecutor(
+            max_workers=settings.embedding_workers,
+            queue_depth=settings.embedding_queue_depth
+        )
+        logger.info(
+            f"Started embedding executor ({_embedding_executor.max_workers} workers, "
+            f"queue depth {_embedding_executor.queue_depth})"
+        )
+    return _embedding_executor
+
+def shutdown_embedding_executor():
+    """Shut down the process-wide embedding executor (called on shutdown)"""
+    global _embedding_executor
+    if _embedding_executor is not None:
+        _embedding_executor.shutdown()
+        _embedding_executor = None
@@ -1,41 +1,68 @@
-from fastembed import TextEmbedding
-from typing import List
+from typing import List, Optional
 import asyncio
+import numpy as np
+from app.utils.batching import length_sorted_order
+from app.utils.cache import LRUCache
 from app.utils.config import get_settings
+from app.services.embedding_cache import get_embedding_cache
+from app.services.embedding_executor import get_embedding_executor
+from app.services.embedding_workers import get_embedding_worker_pool
+from app.services.model_registry import get_model_registry, resolve_model_name
+from app.services.query_batcher import get_query_batcher
 from app.utils.logging_optimized import get_logger
 
 logger = get_logger(__name__)
 
+# Process-wide cache of query embeddings keyed by (model, normalized query)
+_query_cache: Optional[LRUCache] = None
+
+def get_query_cache() -> LRUCache:
+    """Get the process-wide query embedding cache"""
+    global _query_cache
+    if _query_cache is None:
+        settings = get_settings()
+        _query_cache = LRUCache(settings.query_cache_size, settings.query_cache_ttl_seconds)
+    return _query_cache
+
+def normalize_query(query: str) -> str:
+    """Normalize query text for cache lookups (trim and collapse whitespace)"""
+    return " ".join(query.split())
+
 class EmbeddingService:
     """Optimized vector embedding service using FastEmbed"""
     
     def __init__(self):
         self.settings = get_settings()
         self.model = None
+        self.model_name = resolve_model_name()
         self._load_model()
     
     def _load_model(self):
-        """Load the FastEmbed model"""
+        """Get the shared FastEmbed model from the process-wide registry"""
         try:
-            logger.info("Loading FastEmbed model (BAAI/bge-small-en-v1.5)")
-            # FastEmbed uses BAAI/bge-small-en-v1.5 by default
-            self.model = TextEmbedding()
-            logger.info("FastEmbed model loaded successfully")
+            # The registry loads the model once per process; later services reuse it
+            self.model = get_model_registry().get_model(self.model_name)
         except Exception as e:
             logger.error(f"Failed to load FastEmbed model: {e}")
             raise Exception(f"Failed to load embedding model: {e}")
     
     async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for a list of texts"""
+        return list(await self.generate_embedding_matrix(texts))
+    
+    async def generate_embedding_matrix(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings as one contiguous (n, dim) float32 matrix"""
         if not self.model:
             raise Exception("Embedding model not loaded")
         
         try:
             if not texts:
-                return []
+                return np.empty((0, self.get_embedding_dimension()), dtype=np.float32)
             
-            # Generate embeddings using FastEmbed
-            embeddings = list(self.model.embed(texts))
+            if self.settings.embedding_cache_enabled:
+                embeddings = await self._embed_with_cache(texts)
+            else:
+                embeddings = await self._embed_uncached(texts)
             
             logger.info(f"Generated {len(embeddings)} embeddings using FastEmbed")
             return embeddings
@@ -50,16 +77,98 @@ class EmbeddingService:
             if not self.model:
                 raise Exception("Embedding model not loaded")
             
-            embeddings = list(self.model.embed([query]))
-            return embeddings[0]
+            query = normalize_query(query)
+            cache_key = (self.model_name, query)
+            if self.settings.query_cache_enabled:
+                cached = get_query_cache().get(cache_key)
+                if cached is not None:
+                    return cached
+            
+            # Coalesce with other in-flight queries into one model call
+            if self.settings.query_batching_enabled:
+                embedding = await get_query_batcher(self.model_name).embed(query)
+            else:
+                embeddings = await get_embedding_executor().run(self._embed_sync, [query])
+                embedding = embeddings[0]
+            
+            if self.settings.query_cache_enabled:
+                get_query_cache().set(cache_key, embedding)
+            return embedding
             
         except Exception as e:
             logger.error(f"Error generating query embedding for: {query}")
             raise Exception(f"Failed to generate query embedding: {e}")
     
+    def _embed_sync(self, texts: List[str]) -> List:
+        """Run the model over texts (blocking, called on the inference pool)"""
+        return list(self.model.embed(texts))
+    
+    def _embed_matrix_sync(self, texts: List[str]) -> np.ndarray:
+        """Embed texts straight into a preallocated float32 matrix (blocking)"""
+        # Feed the model length-sorted texts so batches carry little padding;
+        # each vector is written back to its original row
+        if self.settings.embedding_length_bucketing:
+            order = length_sorted_order(texts)
+        else:
+            order = np.arange(len(texts))
+        
+        matrix = None
+        vectors = self.model.embed([texts[i] for i in order], batch_size=self.settings.embedding_batch_size)
+        for row, vector in zip(order, vectors):
+            if matrix is None:
+                matrix = np.empty((len(texts), len(vector)), dtype=np.float32)
+            matrix[row] = vector
+        if matrix is None:
+            return np.empty((0, self.get_embedding_dimension()), dtype=np.float32)
+        return matrix
+    
+    async def _embed_uncached(self, texts: List[str]) -> np.ndarray:
+        """Run the model over texts off the event loop"""
+        # Large ingest batches are sharded across worker processes when enabled; ingest
+        # embeds at most one chunk window per call, so the threshold never exceeds it.
+        # This service's own settings decide, so a caller can opt out of the shared pool
+        worker_pool = None
+        min_texts = min(self.settings.embedding_parallel_min_texts, self.settings.ingest_chunk_window)
+        if self.settings.embedding_parallel_workers > 0 and len(texts) >= min_texts:
+            worker_pool = get_embedding_worker_pool()
+        if worker_pool is not None:
+            return await worker_pool.embed(texts)
+        
+        return await get_embedding_executor().run(self._embed_matrix_sync, texts)
+    
+    async def _embed_with_cache(self, texts: List[str]) -> np.ndarray:
+        """Serve unchanged chunks from the persistent cache and embed only the misses"""
+        cache = await asyncio.to_thread(get_embedding_cache)
+        model_name = self.model_name
+        
+        try:
+            cached = await asyncio.to_thread(cache.get_many, model_name, texts)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed, embedding all chunks: {e}")
+            cached = {}
+        
+        missing = [i for i in range(len(texts)) if i not in cached]
+        if not missing:
+            matrix = np.empty((len(texts), len(cached[0])), dtype=np.float32)
+        else:
+            missing_texts = [texts[i] for i in missing]
+            computed = await self._embed_uncached(missing_texts)
+            matrix = np.empty((len(texts), computed.shape[1]), dtype=np.float32)
+            matrix[missing] = computed
+            try:
+                await asyncio.to_thread(cache.put_many, model_name, missing_texts, computed)
+            except Exception as e:
+                logger.warning(f"Failed to store embeddings in cache: {e}")
+        
+        for i, vector in cached.items():
+            matrix[i] = vector
+        
+        logger.info(f"Embedding cache: {len(cached)} hits, {len(missing)} misses")
+        return matrix
+    
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings"""
-        return 384  # BAAI/bge-small-en-v1.5 dimension
+        return get_model_registry().get_dimension(self.model_name)
     
     def is_model_loaded(self) -> bool:
         """Check if the model is loaded"""
@@ -0,0 +1,198 @@
+"""
+Embedding Worker Pool - Data-parallel embedding for large ingest jobs
+Shards chunk batches across worker processes, each holding its own ONNX session
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.batching import length_sorted_order
+from app.utils.config import get_settings
+from app.utils.logging_optimized import get_logger
+
+logger = get_logger(__name__)
+
+# Model held by each worker process (set by the pool initializer)
+_worker_model = None
+
+def _init_worker(model_name: str, quantized: bool, threads: int):
+    """Load the embedding model once per worker process"""
+    global _worker_model
+    from fastembed import TextEmbedding
+    from app.services.model_registry import resolve_model_name
+
+    # Custom (quantized) models must be registered again in every process
+    resolved = resolve_model_name(model_name, quantized)
+    _worker_model = TextEmbedding(model_name=resolved, threads=threads)
+
+def _embed_shard(texts: List[str]) -> Tuple[int, np.ndarray, float]:
+    """Embed one shard in a worker; returns (worker pid, float32 matrix, seconds)"""
+    start_time = time.perf_counter()
+    matrix = np.stack(list(_worker_model.embed(texts, batch_size=len(texts)))).astype(np.float32, copy=False)
+    return os.getpid(), matrix, time.perf_counter() - start_time
+
+class EmbeddingWorkerPool:
+    """Pool of embedding processes with per-worker throughput stats"""
+
+    def __init__(self, workers: int, batch_size: int, threads_per_worker: int):
+        self.settings = get_settings()
+        self.workers = max(workers, 1)
+        self.batch_size = max(batch_size, 1)
+        self.threads_per_worker = max(threads_per_worker, 1)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._executor = self._new_executor()
+        self._worker_stats: Dict[int, Dict] = {}
+        self.jobs_total = 0
+        self.crashes_total = 0
+        self.restarts_total = 0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        """Start a fresh set of worker processes"""
+        # spawn: forking a process that already runs ONNX/BLAS threads is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.settings.embedding_model, self.settings.embedding_quantized, self.threads_per_worker)
+        )
+
+    def _restart(self, generation: int):
+        """Replace a broken pool (once per generation, however many callers saw it)"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            old_executor = self._executor
+            self._executor = self._new_executor()
+            self._generation += 1
+            self.restarts_total += 1
+        old_executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning(f"Restarted embedding worker pool ({self.workers} workers)")
+
+    async def _embed_shards(self, shards: List[List[str]]) -> List[Tuple[int, np.ndarray, float]]:
+        """Run every shard on the pool; a dead worker (e.g. OOM) breaks the whole pool, so restart and retry once"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            generation = self._generation
+            try:
+                futures = [loop.run_in_executor(self._executor, _embed_shard, shard) for shard in shards]
+                results = await asyncio.gather(*futures, return_exceptions=True)
+            except BrokenProcessPool as e:
+                results = [e]
+
+            errors = [result for result in results if isinstance(result, BaseException)]
+            if not errors:
+                return results
+            if not any(isinstance(error, BrokenProcessPool) for error in errors):
+                raise errors[0]
+
+            self.crashes_total += 1
+            self._restart(generation)
+            if attempt == 1:
+                raise Exception(f"Embedding worker crashed while embedding {len(shards)} shards")
+            logger.warning("Embedding worker crashed, retrying the batch on a fresh pool")
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts across the pool, returning an (n, dim) float32 matrix in input order"""
+        # Shard in length order so every worker batch pads to similar lengths
+        if self.settings.embedding_length_bucketing:
+            order = length_sorted_order(texts)
+        else:
+            order = np.arange(len(texts))
+        ordered = [texts[i] for i in order]
+        shards = [ordered[i:i + self.batch_size] for i in range(0, len(ordered), self.batch_size)]
+        start_time = time.perf_counter()
+
+        results = await self._embed_shards(shards)
+
+        matrix = np.empty((len(texts), results[0][1].shape[1]), dtype=np.float32)
+        offset = 0
+        for (pid, shard_matrix, seconds), shard in zip(results, shards):
+            matrix[order[offset:offset + len(shard)]] = shard_matrix
+            offset += len(shard)
+            self._record(pid, len(shard), seconds)
+
+        self.jobs_total += 1
+        elapsed = time.perf_counter() - start_time
+        logger.info(
+            f"Embedded {len(texts)} texts in {len(shards)} shards across {self.workers} workers "
+            f"in {elapsed:.2f}s ({len(texts) / elapsed if elapsed else 0:.0f} texts/s)"
+        )
+        return matrix
+
+    def _record(self, pid: int, texts: int, seconds: float):
+        """Accumulate throughput for one worker"""
+        with self._lock:
+            stats = self._worker_stats.setdefault(pid, {"pid": pid, "batches": 0, "texts": 0, "seconds": 0.0})
+            stats["batches"] += 1
+            stats["texts"] += texts
+            stats["seconds"] += seconds
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self) -> Dict:
+        """Get pool configuration and per-worker throughput"""
+        with self._lock:
+            workers = []
+            for stats in self._worker_stats.values():
+                workers.append({
+                    **stats,
+                    "seconds": round(stats["seconds"], 3),
+                    "texts_per_second": round(stats["texts"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+                })
+        return {
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "threads_per_worker": self.threads_per_worker,
+            "jobs_total": self.jobs_total,
+            "crashes_total": self.crashes_total,
+            "restarts_total": self.restarts_total,
+            "per_worker": workers
+        }
+
+_worker_pool: Optional[EmbeddingWorkerPool] = None
+
+def get_embedding_worker_pool() -> Optional[EmbeddingWorkerPool]:
+    """Get the process-wide embedding worker pool (None when disabled)"""
+    global _worker_pool
+    settings = get_settings()
+    if settings.embedding_parallel_workers <= 0:
+        return None
+    if _worker_pool is None:
+        # The API's own ONNX session keeps its EMBEDDING_THREADS (unset: one per core) alongside the workers
+        cores = os.cpu_count() or 1
+        worker_threads = settings.embedding_parallel_workers * max(settings.embedding_parallel_threads, 1)
+        session_threads = settings.embedding_threads or cores
+        if worker_threads + session_threads > cores:
+            logger.warning(
+                f"Embedding threads oversubscribe {cores} cores: {settings.embedding_parallel_workers} workers x "
+                f"{settings.embedding_parallel_threads} threads plus {session_threads} in-process session threads"
+            )
+        _worker_pool = EmbeddingWorkerPool(
+            workers=settings.embedding_parallel_workers,
+            batch_size=settings.embedding_parallel_batch_size,
+            threads_per_worker=settings.embedding_parallel_threads
+        )
+        logger.info(f"Started embedding worker pool ({_worker_pool.workers} processes)")
+    return _worker_pool
+
+def get_embedding_worker_stats() -> Optional[Dict]:
+    """Get worker pool stats without starting the pool"""
+    return _worker_pool.get_stats() if _worker_pool is not None else None
+
+def shutdown_embedding_worker_pool():
+    """Shut down the embedding worker pool (called on shutdown)"""
+    global _worker_pool
+    if _worker_pool is not None:
+        _worker_pool.shutdown()
+        _worker_pool = None
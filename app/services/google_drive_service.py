@@ -3,18 +3,85 @@ Google Drive Service - Handles Google Drive API operations
 Updated for centralized OAuth with connection-based access
 """
 
-import httpx
-from typing import List, Dict, Optional, Tuple
+import asyncio
+import io
+import os
+import tempfile
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
 from datetime import datetime
 import hashlib
 
 from app.utils.config import get_settings
 from app.utils.logging_optimized import get_logger
+from app.services.http_client import get_http_client
 from app.services.google_oauth_service import GoogleOAuthService
 from app.services.token_storage import TokenStorage
 
 logger = get_logger(__name__)
 
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# File types ingested by default
+SUPPORTED_MIME_TYPES = [
+    'application/pdf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.google-apps.document',
+    'text/plain',
+    'text/csv'
+]
+
+# Listing responses worth retrying (rate limits and transient server errors)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class DownloadedFile:
+    """A downloaded file held in memory, or in a temp file once it outgrows the spool limit"""
+    
+    def __init__(self, filename: str, spool_max_bytes: int):
+        self.filename = filename
+        self.spool_max_bytes = spool_max_bytes
+        self.size = 0
+        self.sha256: Optional[str] = None
+        self.path: Optional[str] = None
+        self._hash = hashlib.sha256()
+        self._buffer = io.BytesIO()
+        self._file = None
+        self._content: Optional[bytes] = None
+    
+    def write(self, block: bytes):
+        """Append a block, hashing it and rolling over to disk past the spool limit"""
+        self._hash.update(block)
+        self.size += len(block)
+        if self._file is None and self.size > self.spool_max_bytes:
+            self._file = tempfile.NamedTemporaryFile(prefix="docingest-download-", delete=False)
+            self.path = self._file.name
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        if self._file is not None:
+            self._file.write(block)
+        else:
+            self._buffer.write(block)
+    
+    def finish(self):
+        """Seal the download once every block is written"""
+        self.sha256 = self._hash.hexdigest()
+        if self._file is not None:
+            self._file.close()
+        else:
+            self._content = self._buffer.getvalue()
+            self._buffer = None
+    
+    @property
+    def content(self) -> Union[bytes, str]:
+        """Bytes for small files, the temp file path for spooled ones (the parser accepts either)"""
+        return self.path if self.path else self._content
+    
+    def cleanup(self):
+        """Delete the temp file, if any"""
+        if self._file is not None:
+            self._file.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
 class GoogleDriveService:
     """Google Drive API service using centralized OAuth connections"""
     
@@ -43,26 +110,26 @@ class GoogleDriveService:
                 }
             
             # Test with Drive About API
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.about_endpoint,
-                    headers={'Authorization': f'Bearer {access_token}'},
-                    params={'fields': 'user,storageQuota'}
-                )
+            client = get_http_client()
+            response = await client.get(
+                self.about_endpoint,
+                headers={'Authorization': f'Bearer {access_token}'},
+                params={'fields': 'user,storageQuota'}
+            )
+            
+            if response.status_code == 200:
+                about_data = response.json()
+                return {
+                    'valid': True,
+                    'user': about_data.get('user', {}),
+                    'storage': about_data.get('storageQuota', {})
+                }
+            else:
+                return {
+                    'valid': False,
+                    'error': f'Drive API error: {response.status_code}'
+                }
                 
-                if response.status_code == 200:
-                    about_data = response.json()
-                    return {
-                        'valid': True,
-                        'user': about_data.get('user', {}),
-                        'storage': about_data.get('storageQuota', {})
-                    }
-                else:
-                    return {
-                        'valid': False,
-                        'error': f'Drive API error: {response.status_code}'
-                    }
-                    
         except Exception as e:
             logger.error(f"Failed to test connection {connection_id}: {e}")
             return {
@@ -82,151 +149,290 @@ class GoogleDriveService:
             if not folder_id:
                 folder_id = 'root'
             
-            async with httpx.AsyncClient() as client:
-                params = {
-                    'q': f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
-                    'fields': 'files(id,name,createdTime,modifiedTime,webViewLink)',
-                    'orderBy': 'name'
-                }
-                
-                response = await client.get(
-                    self.files_endpoint,
-                    headers={'Authorization': f'Bearer {access_token}'},
-                    params=params
-                )
+            client = get_http_client()
+            params = {
+                'q': f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
+                'fields': 'files(id,name,createdTime,modifiedTime,webViewLink)',
+                'orderBy': 'name'
+            }
+            
+            response = await client.get(
+                self.files_endpoint,
+                headers={'Authorization': f'Bearer {access_token}'},
+                params=params
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                folders = []
+                for folder in data.get('files', []):
+                    folders.append({
+                        'id': folder['id'],
+                        'name': folder['name'],
+                        'created_time': folder.get('createdTime'),
+                        'modified_time': folder.get('modifiedTime'),
+                        'web_view_link': folder.get('webViewLink')
+                    })
+                return folders
+            else:
+                logger.error(f"Failed to list folders: {response.status_code}")
+                return []
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    folders = []
-                    for folder in data.get('files', []):
-                        folders.append({
-                            'id': folder['id'],
-                            'name': folder['name'],
-                            'created_time': folder.get('createdTime'),
-                            'modified_time': folder.get('modifiedTime'),
-                            'web_view_link': folder.get('webViewLink')
-                        })
-                    return folders
-                else:
-                    logger.error(f"Failed to list folders: {response.status_code}")
-                    return []
-                    
         except Exception as e:
             logger.error(f"Error listing folders: {e}")
             return []
     
     async def list_drive_files(self, connection_id: str, folder_id: str = None, 
                              file_types: List[str] = None) -> List[Dict]:
-        """List files in Google Drive folder"""
+        """List files in Google Drive folder, most recently modified first (every page, no subfolders)"""
+        try:
+            return [
+                file async for file in self.crawl_drive_files(
+                    connection_id, [folder_id or 'root'], file_types, recursive=False,
+                    order_by='modifiedTime desc'
+                )
+            ]
+        except Exception as e:
+            logger.error(f"Error listing files: {e}")
+            return []
+    
+    async def crawl_drive_files(self, connection_id: str, folder_ids: List[str],
+                                file_types: List[str] = None, recursive: bool = True,
+                                order_by: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Yield every file under the given folders as it is found, walking subfolders breadth-first"""
+        # order_by (Drive orderBy) holds within each folder; a multi-folder crawl interleaves folders
+        mime_query = " or ".join([f"mimeType='{mime}'" for mime in (file_types or SUPPORTED_MIME_TYPES)])
+        if recursive:
+            mime_query += f" or mimeType='{FOLDER_MIME_TYPE}'"
+        
+        folders: asyncio.Queue = asyncio.Queue()
+        files: asyncio.Queue = asyncio.Queue(maxsize=self.settings.drive_page_size)
+        seen_folders = set()
+        seen_files = set()
+        
+        for folder_id in folder_ids or ['root']:
+            if folder_id not in seen_folders:
+                seen_folders.add(folder_id)
+                folders.put_nowait(folder_id)
+        
+        async def crawl_folders():
+            """List queued folders page by page, queueing subfolders behind them"""
+            while True:
+                folder_id = await folders.get()
+                try:
+                    page_token = None
+                    while True:
+                        data = await self._list_folder_page(connection_id, folder_id, mime_query, page_token, order_by)
+                        for item in data.get('files', []):
+                            if item['mimeType'] == FOLDER_MIME_TYPE:
+                                # Folders reachable twice (multiple parents, overlapping roots) are listed once
+                                if recursive and item['id'] not in seen_folders:
+                                    seen_folders.add(item['id'])
+                                    folders.put_nowait(item['id'])
+                            elif item['id'] not in seen_files:
+                                seen_files.add(item['id'])
+                                await files.put(self._file_info(item))
+                        page_token = data.get('nextPageToken')
+                        if not page_token:
+                            break
+                finally:
+                    folders.task_done()
+        
+        async def crawl():
+            """Run the folder workers until every queued folder is listed or one fails"""
+            workers = [asyncio.create_task(crawl_folders()) for _ in range(max(self.settings.drive_crawl_concurrency, 1))]
+            finished = asyncio.create_task(folders.join())
+            try:
+                await asyncio.wait([finished, *workers], return_when=asyncio.FIRST_COMPLETED)
+                for worker in workers:
+                    if worker.done():
+                        worker.result()
+            finally:
+                for task in [finished, *workers]:
+                    task.cancel()
+                await asyncio.gather(finished, *workers, return_exceptions=True)
+        
+        crawler = asyncio.create_task(crawl())
         try:
+            while True:
+                next_file = asyncio.ensure_future(files.get())
+                await asyncio.wait([next_file, crawler], return_when=asyncio.FIRST_COMPLETED)
+                if next_file.done():
+                    yield next_file.result()
+                    continue
+                
+                # Crawl finished (or failed): hand over what is left, then surface any error
+                next_file.cancel()
+                while not files.empty():
+                    yield files.get_nowait()
+                crawler.result()
+                logger.info(f"Crawled {len(seen_folders)} folders and found {len(seen_files)} files")
+                return
+        finally:
+            if not crawler.done():
+                crawler.cancel()
+            await asyncio.gather(crawler, return_exceptions=True)
+    
+    async def _list_folder_page(self, connection_id: str, folder_id: str, mime_query: str,
+                                page_token: Optional[str] = None, order_by: Optional[str] = None) -> Dict:
+        """Fetch one page of a folder listing, retrying rate limits and server errors"""
+        params = {
+            'q': f"'{folder_id}' in parents and ({mime_query}) and trashed=false",
+            'fields': 'nextPageToken,files(id,name,mimeType,size,createdTime,modifiedTime,webViewLink,md5Checksum,parents)',
+            'pageSize': self.settings.drive_page_size,
+            'supportsAllDrives': 'true',
+            'includeItemsFromAllDrives': 'true'
+        }
+        if page_token:
+            params['pageToken'] = page_token
+        if order_by:
+            params['orderBy'] = order_by
+        
+        client = get_http_client()
+        for attempt in range(self.settings.drive_list_retries + 1):
+            # Fetched per page so a long crawl picks up refreshed tokens
             access_token = await self.get_connection_access_token(connection_id)
             if not access_token:
-                logger.error(f"No access token for connection {connection_id}")
-                return []
+                raise Exception(f"No access token for connection {connection_id}")
             
-            # Default to root folder if no folder_id provided
-            if not folder_id:
-                folder_id = 'root'
+            response = await client.get(
+                self.files_endpoint,
+                headers={'Authorization': f'Bearer {access_token}'},
+                params=params
+            )
             
-            # Build query for file types
-            mime_types = [
-                'application/pdf',
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'application/vnd.google-apps.document',
-                'text/plain'
-            ]
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.settings.drive_list_retries:
+                logger.warning(f"Drive listing of folder {folder_id} returned {response.status_code}, retrying")
+                await asyncio.sleep(2 ** attempt)
+                continue
+            raise Exception(f"Failed to list folder {folder_id}: {response.status_code}")
+    
+    def _file_info(self, file: Dict) -> Dict:
+        """File record used by ingest from a Drive listing entry"""
+        return {
+            'id': file['id'],
+            'name': file['name'],
+            'mime_type': file['mimeType'],
+            'size': file.get('size'),
+            'created_time': file.get('createdTime'),
+            'modified_time': file.get('modifiedTime'),
+            'web_view_link': file.get('webViewLink'),
+            'md5_checksum': file.get('md5Checksum'),
+            'parents': file.get('parents', [])
+        }
+    
+    async def download_file(self, connection_id: str, file_id: str,
+                            metadata: Optional[Dict] = None) -> Tuple[bytes, str]:
+        """Download file content from Google Drive (pass the file's listing record as metadata to skip the metadata lookup)"""
+        try:
+            access_token = await self.get_connection_access_token(connection_id)
+            if not access_token:
+                raise Exception(f"No access token for connection {connection_id}")
             
-            if file_types:
-                mime_types = file_types
+            client = get_http_client()
+            filename, download_url, params = await self._download_request(client, access_token, file_id, metadata)
             
-            mime_query = " or ".join([f"mimeType='{mime}'" for mime in mime_types])
-            query = f"'{folder_id}' in parents and ({mime_query}) and trashed=false"
+            # Download file content
+            download_response = await client.get(
+                download_url,
+                headers={'Authorization': f'Bearer {access_token}'},
+                params=params
+            )
             
-            async with httpx.AsyncClient() as client:
-                params = {
-                    'q': query,
-                    'fields': 'files(id,name,mimeType,size,createdTime,modifiedTime,webViewLink,md5Checksum)',
-                    'orderBy': 'modifiedTime desc'
-                }
+            if download_response.status_code == 200:
+                content = download_response.content
+                logger.info(f"Downloaded file {filename} ({len(content)} bytes)")
+                return content, filename
+            else:
+                raise Exception(f"Failed to download file: {download_response.status_code}")
                 
-                response = await client.get(
-                    self.files_endpoint,
-                    headers={'Authorization': f'Bearer {access_token}'},
-                    params=params
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    files = []
-                    for file in data.get('files', []):
-                        files.append({
-                            'id': file['id'],
-                            'name': file['name'],
-                            'mime_type': file['mimeType'],
-                            'size': file.get('size'),
-                            'created_time': file.get('createdTime'),
-                            'modified_time': file.get('modifiedTime'),
-                            'web_view_link': file.get('webViewLink'),
-                            'md5_checksum': file.get('md5Checksum')
-                        })
-                    return files
-                else:
-                    logger.error(f"Failed to list files: {response.status_code}")
-                    return []
-                    
         except Exception as e:
-            logger.error(f"Error listing files: {e}")
-            return []
+            logger.error(f"Error downloading file {file_id}: {e}")
+            raise
     
-    async def download_file(self, connection_id: str, file_id: str) -> Tuple[bytes, str]:
-        """Download file content from Google Drive"""
+    async def stream_download(self, connection_id: str, file_id: str,
+                              metadata: Optional[Dict] = None) -> "DownloadedFile":
+        """Stream a file to memory or a temp file, hashing it and enforcing max_file_size as bytes arrive"""
         try:
             access_token = await self.get_connection_access_token(connection_id)
             if not access_token:
                 raise Exception(f"No access token for connection {connection_id}")
             
-            # First get file metadata
-            async with httpx.AsyncClient() as client:
-                metadata_response = await client.get(
-                    f"{self.files_endpoint}/{file_id}",
-                    headers={'Authorization': f'Bearer {access_token}'},
-                    params={'fields': 'name,mimeType,size'}
-                )
-                
-                if metadata_response.status_code != 200:
-                    raise Exception(f"Failed to get file metadata: {metadata_response.status_code}")
-                
-                metadata = metadata_response.json()
-                filename = metadata['name']
-                mime_type = metadata['mimeType']
-                
-                # Handle Google Docs files (need to export)
-                if mime_type.startswith('application/vnd.google-apps'):
-                    export_mime_type = self._get_export_mime_type(mime_type)
-                    download_url = f"{self.files_endpoint}/{file_id}/export"
-                    params = {'mimeType': export_mime_type}
-                else:
-                    download_url = f"{self.files_endpoint}/{file_id}"
-                    params = {'alt': 'media'}
-                
-                # Download file content
-                download_response = await client.get(
+            client = get_http_client()
+            filename, download_url, params = await self._download_request(client, access_token, file_id, metadata)
+            max_size = self.settings.max_file_size
+            
+            # Listed size is known up front for binary files (not for Google Docs exports)
+            listed_size = int(metadata['size']) if metadata and metadata.get('size') else None
+            if listed_size is not None and listed_size > max_size:
+                raise Exception(f"File {filename} is {listed_size} bytes, over the {max_size} byte limit")
+            
+            download = DownloadedFile(filename, self.settings.download_spool_max_bytes)
+            try:
+                async with client.stream(
+                    'GET',
                     download_url,
                     headers={'Authorization': f'Bearer {access_token}'},
                     params=params
-                )
-                
-                if download_response.status_code == 200:
-                    content = download_response.content
-                    logger.info(f"Downloaded file {filename} ({len(content)} bytes)")
-                    return content, filename
-                else:
-                    raise Exception(f"Failed to download file: {download_response.status_code}")
+                ) as response:
+                    if response.status_code != 200:
+                        raise Exception(f"Failed to download file: {response.status_code}")
                     
+                    content_length = response.headers.get('content-length')
+                    if content_length and int(content_length) > max_size:
+                        raise Exception(f"File {filename} is {content_length} bytes, over the {max_size} byte limit")
+                    
+                    async for block in response.aiter_bytes(self.settings.download_chunk_bytes):
+                        download.write(block)
+                        if download.size > max_size:
+                            raise Exception(f"File {filename} exceeded the {max_size} byte limit while downloading")
+                
+                download.finish()
+            except BaseException:
+                download.cleanup()
+                raise
+            
+            logger.info(f"Downloaded file {filename} ({download.size} bytes{', spooled to disk' if download.path else ''})")
+            return download
+            
         except Exception as e:
             logger.error(f"Error downloading file {file_id}: {e}")
             raise
     
+    async def _download_request(self, client, access_token: str, file_id: str,
+                                metadata: Optional[Dict]) -> Tuple[str, str, Dict]:
+        """Filename, URL and query parameters for downloading (or exporting) a file"""
+        if metadata is not None:
+            filename = metadata['name']
+            mime_type = metadata['mime_type']
+        else:
+            metadata_response = await client.get(
+                f"{self.files_endpoint}/{file_id}",
+                headers={'Authorization': f'Bearer {access_token}'},
+                params={'fields': 'name,mimeType,size', 'supportsAllDrives': 'true'}
+            )
+            
+            if metadata_response.status_code != 200:
+                raise Exception(f"Failed to get file metadata: {metadata_response.status_code}")
+            
+            file_metadata = metadata_response.json()
+            filename = file_metadata['name']
+            mime_type = file_metadata['mimeType']
+        
+        # Handle Google Docs files (need to export)
+        if mime_type.startswith('application/vnd.google-apps'):
+            export_mime_type = self._get_export_mime_type(mime_type)
+            return filename, f"{self.files_endpoint}/{file_id}/export", {'mimeType': export_mime_type}
+        return filename, f"{self.files_endpoint}/{file_id}", {'alt': 'media', 'supportsAllDrives': 'true'}
+    
+    def get_content_mime_type(self, mime_type: str) -> str:
+        """MIME type of the content download_file returns (Google Docs files are exported)"""
+        if mime_type.startswith('application/vnd.google-apps'):
+            return self._get_export_mime_type(mime_type)
+        return mime_type
+    
     def _get_export_mime_type(self, google_docs_mime_type: str) -> str:
         """Get export MIME type for Google Docs files"""
         export_types = {
@@ -237,7 +443,7 @@ class GoogleDriveService:
         return export_types.get(google_docs_mime_type, 'application/pdf')
     
     def get_file_sha256(self, content: bytes) -> str:
-        """Calculate SHA256 hash of file content"""
+        """Calculate SHA256 hash of file content (stream_download hashes while downloading)"""
         return hashlib.sha256(content).hexdigest()
     
     async def get_folder_hierarchy(self, connection_id: str, folder_id: str = None) -> Dict:
@@ -250,24 +456,24 @@ class GoogleDriveService:
             if not folder_id:
                 folder_id = 'root'
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.files_endpoint}/{folder_id}",
-                    headers={'Authorization': f'Bearer {access_token}'},
-                    params={'fields': 'id,name,parents'}
-                )
+            client = get_http_client()
+            response = await client.get(
+                f"{self.files_endpoint}/{folder_id}",
+                headers={'Authorization': f'Bearer {access_token}'},
+                params={'fields': 'id,name,parents'}
+            )
+            
+            if response.status_code == 200:
+                folder_data = response.json()
+                hierarchy = {
+                    'id': folder_data['id'],
+                    'name': folder_data['name'],
+                    'parents': folder_data.get('parents', [])
+                }
+                return hierarchy
+            else:
+                return {}
                 
-                if response.status_code == 200:
-                    folder_data = response.json()
-                    hierarchy = {
-                        'id': folder_data['id'],
-                        'name': folder_data['name'],
-                        'parents': folder_data.get('parents', [])
-                    }
-                    return hierarchy
-                else:
-                    return {}
-                    
         except Exception as e:
             logger.error(f"Error getting folder hierarchy: {e}")
             return {}
@@ -284,37 +490,37 @@ class GoogleDriveService:
             if folder_id:
                 search_query += f" and '{folder_id}' in parents"
             
-            async with httpx.AsyncClient() as client:
-                params = {
-                    'q': search_query,
-                    'fields': 'files(id,name,mimeType,size,createdTime,modifiedTime,webViewLink)',
-                    'orderBy': 'modifiedTime desc'
-                }
-                
-                response = await client.get(
-                    self.files_endpoint,
-                    headers={'Authorization': f'Bearer {access_token}'},
-                    params=params
-                )
+            client = get_http_client()
+            params = {
+                'q': search_query,
+                'fields': 'files(id,name,mimeType,size,createdTime,modifiedTime,webViewLink)',
+                'orderBy': 'modifiedTime desc'
+            }
+            
+            response = await client.get(
+                self.files_endpoint,
+                headers={'Authorization': f'Bearer {access_token}'},
+                params=params
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                files = []
+                for file in data.get('files', []):
+                    files.append({
+                        'id': file['id'],
+                        'name': file['name'],
+                        'mime_type': file['mimeType'],
+                        'size': file.get('size'),
+                        'created_time': file.get('createdTime'),
+                        'modified_time': file.get('modifiedTime'),
+                        'web_view_link': file.get('webViewLink')
+                    })
+                return files
+            else:
+                logger.error(f"Failed to search files: {response.status_code}")
+                return []
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    files = []
-                    for file in data.get('files', []):
-                        files.append({
-                            'id': file['id'],
-                            'name': file['name'],
-                            'mime_type': file['mimeType'],
-                            'size': file.get('size'),
-                            'created_time': file.get('createdTime'),
-                            'modified_time': file.get('modifiedTime'),
-                            'web_view_link': file.get('webViewLink')
-                        })
-                    return files
-                else:
-                    logger.error(f"Failed to search files: {response.status_code}")
-                    return []
-                    
         except Exception as e:
             logger.error(f"Error searching files: {e}")
             return []
@@ -9,11 +9,11 @@ import hmac
 import hashlib
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Tuple
-import httpx
 from urllib.parse import urlencode, parse_qs, urlparse
 
 from app.utils.config import get_settings
 from app.utils.logging_optimized import get_logger
+from app.services.http_client import get_http_client
 from app.services.token_storage import TokenStorage
 
 logger = get_logger(__name__)
@@ -140,20 +140,20 @@ class GoogleOAuthService:
                 return None
             
             # Exchange code for tokens
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.token_url, data={
-                    'client_id': self.settings.google_client_id,
-                    'client_secret': self.settings.google_client_secret,
-                    'code': code,
-                    'grant_type': 'authorization_code',
-                    'redirect_uri': self.settings.google_redirect_uri
-                })
-                
-                if response.status_code != 200:
-                    logger.error(f"Token exchange failed: {response.status_code} - {response.text}")
-                    return None
-                
-                token_data = response.json()
+            client = get_http_client()
+            response = await client.post(self.token_url, data={
+                'client_id': self.settings.google_client_id,
+                'client_secret': self.settings.google_client_secret,
+                'code': code,
+                'grant_type': 'authorization_code',
+                'redirect_uri': self.settings.google_redirect_uri
+            })
+            
+            if response.status_code != 200:
+                logger.error(f"Token exchange failed: {response.status_code} - {response.text}")
+                return None
+            
+            token_data = response.json()
             
             # Get user info
             user_info = await self.get_user_info(token_data['access_token'])
@@ -193,18 +193,18 @@ class GoogleOAuthService:
     async def get_user_info(self, access_token: str) -> Dict:
         """Get user information from Google"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://www.googleapis.com/oauth2/v2/userinfo",
-                    headers={'Authorization': f'Bearer {access_token}'}
-                )
+            client = get_http_client()
+            response = await client.get(
+                "https://www.googleapis.com/oauth2/v2/userinfo",
+                headers={'Authorization': f'Bearer {access_token}'}
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"Failed to get user info: {response.status_code}")
+                return {}
                 
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    logger.error(f"Failed to get user info: {response.status_code}")
-                    return {}
-                    
         except Exception as e:
             logger.error(f"Error getting user info: {e}")
             return {}
@@ -223,19 +223,19 @@ class GoogleOAuthService:
                 return None
             
             # Request new access token
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.token_url, data={
-                    'client_id': self.settings.google_client_id,
-                    'client_secret': self.settings.google_client_secret,
-                    'refresh_token': refresh_token,
-                    'grant_type': 'refresh_token'
-                })
-                
-                if response.status_code != 200:
-                    logger.error(f"Token refresh failed: {response.status_code} - {response.text}")
-                    return None
-                
-                token_data = response.json()
+            client = get_http_client()
+            response = await client.post(self.token_url, data={
+                'client_id': self.settings.google_client_id,
+                'client_secret': self.settings.google_client_secret,
+                'refresh_token': refresh_token,
+                'grant_type': 'refresh_token'
+            })
+            
+            if response.status_code != 200:
+                logger.error(f"Token refresh failed: {response.status_code} - {response.text}")
+                return None
+            
+            token_data = response.json()
             
             # Update stored access token
             self.token_storage.update_access_token(
@@ -279,13 +279,13 @@ class GoogleOAuthService:
             refresh_token = connection['refresh_token']
             
             # Revoke token with Google
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.revoke_url, data={
-                    'token': refresh_token
-                })
-                
-                if response.status_code != 200:
-                    logger.warning(f"Token revocation failed: {response.status_code}")
+            client = get_http_client()
+            response = await client.post(self.revoke_url, data={
+                'token': refresh_token
+            })
+            
+            if response.status_code != 200:
+                logger.warning(f"Token revocation failed: {response.status_code}")
             
             # Mark connection as revoked in database
             self.token_storage.revoke_connection(connection_id)
@@ -0,0 +1,134 @@
+"""
+Shared HTTP Client - One pooled, keep-alive (HTTP/2 where available) client per process
+Used for every Google Drive and OAuth call so connections to googleapis.com are reused
+"""
+
+import importlib.util
+import threading
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from app.utils.config import get_settings
+from app.utils.logging_optimized import get_logger
+from app.utils.metrics import Histogram
+
+logger = get_logger(__name__)
+
+# Histogram buckets in milliseconds
+REQUEST_TIME_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 30000]
+
+class CountingTransport(httpx.AsyncHTTPTransport):
+    """Connection-pooling transport that counts new connections, TLS handshakes and reuse"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.http2 = kwargs.get("http2", False)
+        self._lock = threading.Lock()
+        self.request_time_ms = Histogram(REQUEST_TIME_BUCKETS_MS)
+        self.requests_total = 0
+        self.errors_total = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.http_versions: Dict[str, int] = {}
+
+    async def _trace(self, event: str, info: Dict):
+        """httpcore trace hook - fires only when the pool has to open a connection"""
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request through the pool, recording latency and the protocol used"""
+        request.extensions["trace"] = self._trace
+        start_time = time.perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            with self._lock:
+                self.requests_total += 1
+                self.errors_total += 1
+            raise
+        # Time to response headers; bodies are streamed by the caller
+        self.request_time_ms.observe((time.perf_counter() - start_time) * 1000.0)
+        http_version = response.extensions.get("http_version", b"").decode() or "unknown"
+        with self._lock:
+            self.requests_total += 1
+            self.http_versions[http_version] = self.http_versions.get(http_version, 0) + 1
+        return response
+
+    def get_stats(self) -> Dict:
+        """Get request, connection and reuse statistics"""
+        with self._lock:
+            reused = max(self.requests_total - self.connections_opened, 0)
+            return {
+                "http2_enabled": self.http2,
+                "requests_total": self.requests_total,
+                "errors_total": self.errors_total,
+                "connections_opened": self.connections_opened,
+                "tls_handshakes": self.tls_handshakes,
+                "requests_on_reused_connections": reused,
+                "connection_reuse_ratio": round(reused / self.requests_total, 4) if self.requests_total else 0.0,
+                "http_versions": dict(self.http_versions),
+                "request_time_ms": self.request_time_ms.snapshot()
+            }
+
+_client: Optional[httpx.AsyncClient] = None
+_transport: Optional[CountingTransport] = None
+
+def _http2_available() -> bool:
+    """Whether the h2 package needed for HTTP/2 is installed"""
+    return importlib.util.find_spec("h2") is not None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use"""
+    global _client, _transport
+    if _client is None or _client.is_closed:
+        settings = get_settings()
+        http2 = settings.http_http2 and _http2_available()
+        if settings.http_http2 and not http2:
+            logger.warning("HTTP/2 requested but the h2 package is not installed - using HTTP/1.1")
+
+        _transport = CountingTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds
+            ),
+            retries=settings.http_connect_retries
+        )
+        _client = httpx.AsyncClient(
+            transport=_transport,
+            timeout=httpx.Timeout(
+                settings.http_read_timeout_seconds,
+                connect=settings.http_connect_timeout_seconds,
+                pool=settings.http_pool_timeout_seconds
+            )
+        )
+        logger.info(
+            f"HTTP client ready (http2={http2}, max_connections={settings.http_max_connections}, "
+            f"keepalive={settings.http_max_keepalive_connections})"
+        )
+    return _client
+
+def get_http_stats() -> Dict:
+    """Get shared HTTP client statistics (empty until the first request)"""
+    if _transport is None:
+        return {"initialized": False}
+    return {
+        "initialized": True,
+        "closed": _client is None or _client.is_closed,
+        **_transport.get_stats()
+    }
+
+async def close_http_client():
+    """Close the shared client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
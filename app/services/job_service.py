@@ -38,10 +38,12 @@ class JobService:
             "status": JobStatus.QUEUED,
             "started_at": datetime.utcnow().isoformat(),
             "processed_docs": 0,
+            "skipped_docs": 0,
             "processed_pages": 0,
             "total_docs": 0,
             "total_pages": 0,
-            "errors": []
+            "errors": [],
+            "stage_timings": {}
         }
         
         if self.redis_client:
@@ -139,10 +141,12 @@ class JobService:
             started_at=datetime.fromisoformat(job_dict["started_at"]),
             completed_at=datetime.fromisoformat(job_dict["completed_at"]) if job_dict.get("completed_at") else None,
             processed_docs=job_dict["processed_docs"],
+            skipped_docs=job_dict.get("skipped_docs", 0),
             processed_pages=job_dict["processed_pages"],
             total_docs=job_dict["total_docs"],
             total_pages=job_dict["total_pages"],
-            errors=job_dict["errors"]
+            errors=job_dict["errors"],
+            stage_timings=job_dict.get("stage_timings", {})
         )
     
     def _job_progress_to_dict(self, job: JobProgress) -> Dict:
@@ -153,8 +157,10 @@ class JobService:
             "started_at": job.started_at.isoformat(),
             "completed_at": job.completed_at.isoformat() if job.completed_at else None,
             "processed_docs": job.processed_docs,
+            "skipped_docs": job.skipped_docs,
             "processed_pages": job.processed_pages,
             "total_docs": job.total_docs,
             "total_pages": job.total_pages,
-            "errors": job.errors
+            "errors": job.errors,
+            "stage_timings": job.stage_timings
         }
@@ -0,0 +1,204 @@
+"""
+Manifest Service - Per-tenant record of every ingested Drive file
+SQLite-backed; incremental re-ingest skips files whose Drive checksum, content hash,
+parser version and embedding model all match the manifest
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.models.query import DocumentMetadata
+from app.utils.config import get_settings
+from app.utils.logging_optimized import get_logger
+
+logger = get_logger(__name__)
+
+COLUMNS = [
+    "doc_id", "title", "mime_type", "sha256", "modified_at", "drive_path", "page_count",
+    "chunk_count", "md5_checksum", "parser_version", "embedding_model", "ingested_at"
+]
+
+def parse_drive_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse a Drive RFC 3339 timestamp (e.g. 2024-01-01T10:00:00.000Z)"""
+    if not value:
+        return None
+    return _as_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+def listed_drive_path(file: Dict) -> str:
+    """Path stored for a listed Drive file (its web link, or /name when Drive has none)"""
+    return file.get("web_view_link") or f"/{file.get('name', '')}"
+
+def _as_utc(value: datetime) -> datetime:
+    """Timezone-aware UTC datetime (naive values are taken to be UTC)"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+class ManifestService:
+    """What was ingested for each tenant, and from which version of each file"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.settings = get_settings()
+        self.db_path = db_path or self.settings.manifest_path
+        self._lock = threading.Lock()
+
+        self.recorded_total = 0
+
+        self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection (one per call, safe across executor threads)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def init_database(self):
+        """Initialize SQLite database with the documents table"""
+        try:
+            conn = self._connect()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    tenant TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    mime_type TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    modified_at TEXT NOT NULL,
+                    drive_path TEXT NOT NULL,
+                    page_count INTEGER NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    md5_checksum TEXT,
+                    parser_version TEXT NOT NULL,
+                    embedding_model TEXT NOT NULL,
+                    ingested_at TEXT,
+                    PRIMARY KEY (tenant, doc_id)
+                )
+            """)
+            conn.commit()
+            conn.close()
+            logger.info(f"Ingest manifest initialized at {self.db_path}")
+        except Exception as e:
+            logger.error(f"Failed to initialize ingest manifest: {e}")
+            raise
+
+    def _to_metadata(self, row) -> DocumentMetadata:
+        """Build a DocumentMetadata from a documents row"""
+        record = dict(zip(COLUMNS, row))
+        record["modified_at"] = _as_utc(datetime.fromisoformat(record["modified_at"]))
+        record["ingested_at"] = _as_utc(datetime.fromisoformat(record["ingested_at"])) if record["ingested_at"] else None
+        return DocumentMetadata(**record)
+
+    def load_tenant(self, tenant: str) -> Dict[str, DocumentMetadata]:
+        """Every manifest record for a tenant, keyed by Drive file ID"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM documents WHERE tenant = ?",
+                (tenant,)
+            )
+            return {row[0]: self._to_metadata(row) for row in cursor}
+        finally:
+            conn.close()
+
+    def get(self, tenant: str, doc_id: str) -> Optional[DocumentMetadata]:
+        """Manifest record for one file"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM documents WHERE tenant = ? AND doc_id = ?",
+                (tenant, doc_id)
+            ).fetchone()
+            return self._to_metadata(row) if row else None
+        finally:
+            conn.close()
+
+    def put(self, tenant: str, metadata: DocumentMetadata):
+        """Record (or replace) what was ingested for a file"""
+        record = metadata.model_dump()
+        record["modified_at"] = _as_utc(metadata.modified_at).isoformat()
+        record["ingested_at"] = _as_utc(metadata.ingested_at or datetime.now(timezone.utc)).isoformat()
+
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"INSERT OR REPLACE INTO documents (tenant, {', '.join(COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(COLUMNS))})",
+                [tenant] + [record[column] for column in COLUMNS]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.recorded_total += 1
+
+    def delete(self, tenant: str, doc_id: str):
+        """Forget a file (e.g. after its chunks are removed)"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM documents WHERE tenant = ? AND doc_id = ?", (tenant, doc_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self, tenant: str):
+        """Forget every file of a tenant so the next incremental run re-ingests everything"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM documents WHERE tenant = ?", (tenant,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def is_current(self, record: Optional[DocumentMetadata], parser_version: str, embedding_model: str) -> bool:
+        """Whether a record's chunks were produced by the current parser and embedding model"""
+        return (
+            record is not None
+            and record.parser_version == parser_version
+            and record.embedding_model == embedding_model
+        )
+
+    def is_unchanged(self, record: Optional[DocumentMetadata], file: Dict,
+                     parser_version: str, embedding_model: str) -> bool:
+        """Whether a listed Drive file matches its record, so it can be skipped before download"""
+        if not self.is_current(record, parser_version, embedding_model):
+            return False
+
+        # md5Checksum covers binary files; Google Docs only have a modified time
+        if file.get("md5_checksum") and record.md5_checksum:
+            return file["md5_checksum"] == record.md5_checksum
+        modified_at = parse_drive_time(file.get("modified_time"))
+        return modified_at is not None and modified_at == record.modified_at
+
+    def is_relocated(self, record: DocumentMetadata, file: Dict) -> bool:
+        """Whether a listed file's name or path differs from its record (renamed or moved)"""
+        return record.title != file.get("name") or record.drive_path != listed_drive_path(file)
+
+    def get_stats(self) -> Dict:
+        """Get per-tenant document counts and the record counter"""
+        try:
+            conn = self._connect()
+            tenants = dict(conn.execute("SELECT tenant, COUNT(*) FROM documents GROUP BY tenant").fetchall())
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to read ingest manifest: {e}")
+            tenants = None
+
+        with self._lock:
+            return {
+                "path": self.db_path,
+                "documents_per_tenant": tenants,
+                "recorded_total": self.recorded_total
+            }
+
+_manifest_service: Optional[ManifestService] = None
+
+def get_manifest_service() -> ManifestService:
+    """Get the process-wide ingest manifest"""
+    global _manifest_service
+    if _manifest_service is None:
+        _manifest_service = ManifestService()
+    return _manifest_service
@@ -0,0 +1,174 @@
+"""
+Embedding Model Registry - Process-wide cache of loaded FastEmbed models
+Loaded once at application startup and shared by routers and ingest jobs
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import psutil
+from fastembed import TextEmbedding
+from fastembed.common.model_description import ModelSource, PoolingType
+
+from app.utils.config import get_settings
+from app.utils.logging_optimized import get_logger
+
+logger = get_logger(__name__)
+
+# Int8 ONNX exports of supported models, registered with FastEmbed on demand.
+# Trades a little recall for 2-3x CPU throughput; vector size is unchanged.
+QUANTIZED_VARIANTS = {
+    "BAAI/bge-small-en-v1.5": {
+        "model": "docingest/bge-small-en-v1.5-int8", "hf": "Xenova/bge-small-en-v1.5",
+        "dim": 384, "pooling": PoolingType.CLS
+    },
+    "BAAI/bge-base-en-v1.5": {
+        "model": "docingest/bge-base-en-v1.5-int8", "hf": "Xenova/bge-base-en-v1.5",
+        "dim": 768, "pooling": PoolingType.CLS
+    },
+    "BAAI/bge-large-en-v1.5": {
+        "model": "docingest/bge-large-en-v1.5-int8", "hf": "Xenova/bge-large-en-v1.5",
+        "dim": 1024, "pooling": PoolingType.CLS
+    },
+    "sentence-transformers/all-MiniLM-L6-v2": {
+        "model": "docingest/all-MiniLM-L6-v2-int8", "hf": "Xenova/all-MiniLM-L6-v2",
+        "dim": 384, "pooling": PoolingType.MEAN
+    },
+    # Shipped by FastEmbed itself, nothing to register
+    "nomic-ai/nomic-embed-text-v1.5": {"model": "nomic-ai/nomic-embed-text-v1.5-Q"}
+}
+QUANTIZED_MODEL_FILE = "onnx/model_quantized.onnx"
+
+_registered_variants = set()
+
+def resolve_model_name(model_name: Optional[str] = None, quantized: Optional[bool] = None) -> str:
+    """Resolve the FastEmbed model to load from settings (base or quantized variant)"""
+    settings = get_settings()
+    model_name = model_name or settings.embedding_model
+    quantized = settings.embedding_quantized if quantized is None else quantized
+    if not quantized:
+        return model_name
+
+    variant = QUANTIZED_VARIANTS.get(model_name)
+    if variant is None:
+        logger.warning(f"No quantized variant known for {model_name}, using the full-precision model")
+        return model_name
+
+    if "hf" in variant and variant["model"] not in _registered_variants:
+        try:
+            TextEmbedding.add_custom_model(
+                model=variant["model"],
+                pooling=variant["pooling"],
+                normalization=True,
+                sources=ModelSource(hf=variant["hf"]),
+                dim=variant["dim"],
+                model_file=QUANTIZED_MODEL_FILE
+            )
+        except ValueError:
+            pass  # Already registered in this process
+        _registered_variants.add(variant["model"])
+
+    return variant["model"]
+
+class ModelRegistry:
+    """Loads each embedding model once per process and hands out the shared instance"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._models: Dict[str, TextEmbedding] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get_model(self, model_name: Optional[str] = None) -> TextEmbedding:
+        """Get a loaded model, loading it on first use"""
+        model_name = model_name or resolve_model_name()
+
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+
+        # Only one thread pays for the load; the rest wait and reuse it
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = self._load_model(model_name)
+            return self._models[model_name]
+
+    def _load_model(self, model_name: str) -> TextEmbedding:
+        """Load a FastEmbed model and record its load time and memory footprint"""
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        start_time = time.perf_counter()
+
+        try:
+            logger.info(f"Loading FastEmbed model ({model_name})")
+            model = TextEmbedding(model_name=model_name, threads=self.settings.embedding_threads)
+        except Exception as e:
+            logger.error(f"Failed to load FastEmbed model {model_name}: {e}")
+            raise Exception(f"Failed to load embedding model: {e}")
+
+        load_time = time.perf_counter() - start_time
+        rss_after = process.memory_info().rss
+        dimension = self._detect_dimension(model)
+
+        self._stats[model_name] = {
+            "model": model_name,
+            "dimension": dimension,
+            "threads": self.settings.embedding_threads,
+            "loaded_at": datetime.utcnow().isoformat(),
+            "load_time_seconds": round(load_time, 3),
+            "rss_before_bytes": rss_before,
+            "rss_after_bytes": rss_after,
+            "memory_footprint_bytes": max(rss_after - rss_before, 0)
+        }
+
+        logger.info(
+            f"FastEmbed model {model_name} ({dimension} dims) loaded in {load_time:.2f}s "
+            f"(+{(rss_after - rss_before) / (1024 * 1024):.1f} MB RSS)"
+        )
+        return model
+
+    def _detect_dimension(self, model: TextEmbedding) -> int:
+        """Read the vector size from the loaded model"""
+        try:
+            return int(model.embedding_size)
+        except Exception:
+            # Models without a registered size: embed a probe and measure it
+            return len(next(iter(model.embed(["dimension probe"]))))
+
+    def get_dimension(self, model_name: Optional[str] = None) -> int:
+        """Get the embedding dimension of a model, loading it if needed"""
+        model_name = model_name or resolve_model_name()
+        self.get_model(model_name)
+        return self._stats[model_name]["dimension"]
+
+    def preload(self, model_names: Optional[List[str]] = None):
+        """Load the configured models up front (called from the app lifespan)"""
+        for model_name in model_names or [resolve_model_name()]:
+            self.get_model(model_name)
+
+    def is_loaded(self, model_name: Optional[str] = None) -> bool:
+        """Check if a model is already loaded without triggering a load"""
+        return (model_name or resolve_model_name()) in self._models
+
+    def get_stats(self) -> Dict:
+        """Get load time and memory footprint for every loaded model"""
+        return {
+            "models": list(self._stats.values()),
+            "loaded_count": len(self._models),
+            "process_rss_bytes": psutil.Process().memory_info().rss
+        }
+
+    def clear(self):
+        """Drop all loaded models (called on shutdown)"""
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+
+# Process-wide registry shared by all routers and background jobs
+_model_registry = ModelRegistry()
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide embedding model registry"""
+    return _model_registry
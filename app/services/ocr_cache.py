@@ -0,0 +1,183 @@
+"""
+OCR Cache - Persistent cache of OCR text keyed by rendered page content
+SQLite-backed, keyed by a hash of (OCR engine config, page raster), with LRU eviction
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from app.utils.config import get_settings
+from app.utils.logging_optimized import get_logger
+
+logger = get_logger(__name__)
+
+# The entry count is kept in memory; recount this often since parser processes share the file
+COUNT_RESYNC_SECONDS = 300
+
+class OCRCache:
+    """Disk-backed OCR cache so unchanged scanned pages skip OCR on re-ingest"""
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.settings = get_settings()
+        self.db_path = db_path or self.settings.ocr_cache_path
+        self.max_entries = max_entries or self.settings.ocr_cache_max_entries
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._entries = 0
+        self._counted_at = 0.0
+
+        self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection (one per call, safe across OCR threads and parser processes)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def init_database(self):
+        """Initialize SQLite database with the OCR results table"""
+        try:
+            conn = self._connect()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_results (
+                    key TEXT PRIMARY KEY,
+                    engine TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    confidence REAL,
+                    last_used_at INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_results_last_used ON ocr_results(last_used_at)")
+            conn.commit()
+            self._recount(conn)
+            conn.close()
+            logger.info(f"OCR cache initialized at {self.db_path}")
+        except Exception as e:
+            logger.error(f"Failed to initialize OCR cache: {e}")
+            raise
+
+    def _recount(self, conn: sqlite3.Connection):
+        """Resynchronize the in-memory entry count with the table (a full scan)"""
+        entries = conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+        with self._lock:
+            self._entries = entries
+            self._counted_at = time.monotonic()
+
+    @staticmethod
+    def make_key(engine_config: str, raster: bytes) -> str:
+        """Content address for a page's OCR result"""
+        digest = hashlib.sha256(engine_config.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(raster)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up a cached OCR result ({"text", "confidence", "engine"}) or None"""
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT text, confidence, engine FROM ocr_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    # Touch hits so eviction keeps recently used pages
+                    conn.execute("UPDATE ocr_results SET last_used_at = ? WHERE key = ?", (int(time.time()), key))
+                    conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"OCR cache lookup failed: {e}")
+            row = None
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return {"text": row[0], "confidence": row[1], "engine": row[2]} if row else None
+
+    def put(self, key: str, text: str, confidence: Optional[float], engine: str):
+        """Store an OCR result and evict the least recently used entries over the cap"""
+        evicted = 0
+        try:
+            conn = self._connect()
+            try:
+                existed = conn.execute("SELECT 1 FROM ocr_results WHERE key = ?", (key,)).fetchone() is not None
+                conn.execute("""
+                    INSERT OR REPLACE INTO ocr_results (key, engine, text, confidence, last_used_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (key, engine, text, confidence, int(time.time())))
+
+                if time.monotonic() - self._counted_at > COUNT_RESYNC_SECONDS:
+                    self._recount(conn)
+                elif not existed:
+                    with self._lock:
+                        self._entries += 1
+
+                overflow = self._entries - self.max_entries
+                if overflow > 0:
+                    evicted = conn.execute("""
+                        DELETE FROM ocr_results WHERE key IN (
+                            SELECT key FROM ocr_results ORDER BY last_used_at ASC LIMIT ?
+                        )
+                    """, (overflow,)).rowcount
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"OCR cache store failed: {e}")
+            return
+
+        with self._lock:
+            self.stores += 1
+            self._entries -= evicted
+            self.evictions += evicted
+
+    def clear(self):
+        """Drop every cached OCR result"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM ocr_results")
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._entries = 0
+
+    def get_stats(self) -> Dict:
+        """Get entry count and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.db_path,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions
+            }
+
+_ocr_cache: Optional[OCRCache] = None
+
+def get_ocr_cache() -> OCRCache:
+    """Get the process-wide OCR cache"""
+    global _ocr_cache
+    if _ocr_cache is None:
+        _ocr_cache = OCRCache()
+    return _ocr_cache
+
+def get_ocr_cache_stats() -> Optional[Dict]:
+    """Get OCR cache stats without opening the cache"""
+    return _ocr_cache.get_stats() if _ocr_cache is not None else None
@@ -0,0 +1,316 @@
+"""
+OCR Service - Page-parallel OCR for image-only PDF pages
+Tesseract (primary) with EasyOCR fallback, run on a bounded thread pool
+"""
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.ocr_cache import get_ocr_cache, get_ocr_cache_stats
+from app.utils.config import get_settings
+from app.utils.lazy_imports import load_easyocr, load_fitz, load_pil_image, load_pytesseract
+from app.utils.logging_optimized import get_logger
+from app.utils.metrics import Histogram
+
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF
+
+logger = get_logger(__name__)
+
+TESSERACT_CONFIG = "--oem 1 --psm 6"
+OCR_CONFIDENCE = 0.8  # Default confidence reported for OCR pages
+# Tesseract enforces the page timeout itself; this backstop covers the EasyOCR fallback
+ABANDON_AFTER_TIMEOUTS = 1.5
+
+def default_ocr_workers() -> int:
+    """Concurrent OCR pages per parser process, sized so all parser processes share the cores"""
+    settings = get_settings()
+    cores = os.cpu_count() or 1
+    budget = cores // max(settings.parser_workers, 1)
+    return max(budget // max(settings.ocr_threads_per_page, 1), 1)
+
+# Page areas (square inches) below/above which text is assumed small/large print
+SMALL_PAGE_SQ_IN = 5.8 * 8.3  # A5
+LARGE_PAGE_SQ_IN = 11.7 * 16.5  # A3
+
+# Per-page OCR latency buckets (milliseconds) and render resolution buckets (DPI)
+OCR_LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+RENDER_DPI_BUCKETS = [72, 100, 150, 200, 300, 400]
+
+render_dpi = Histogram(RENDER_DPI_BUCKETS)
+
+tesseract_latency_ms = Histogram(OCR_LATENCY_BUCKETS_MS)
+easyocr_latency_ms = Histogram(OCR_LATENCY_BUCKETS_MS)
+
+_easyocr_reader = None
+_easyocr_lock = threading.Lock()
+_easyocr_load_seconds: Optional[float] = None
+
+def get_easyocr_reader():
+    """Get the process-wide EasyOCR reader, loading its models on first use"""
+    global _easyocr_reader, _easyocr_load_seconds
+    if _easyocr_reader is not None:
+        return _easyocr_reader
+
+    # Only one OCR thread pays for the load; the rest wait and reuse it
+    with _easyocr_lock:
+        if _easyocr_reader is None:
+            start_time = time.perf_counter()
+            reader = load_easyocr().Reader(['en'])
+            _easyocr_load_seconds = time.perf_counter() - start_time
+            _easyocr_reader = reader
+            logger.info(f"EasyOCR reader loaded in {_easyocr_load_seconds:.2f}s")
+        return _easyocr_reader
+
+_engine_config: Optional[str] = None
+
+def get_engine_config() -> str:
+    """Engine identity for OCR cache keys; a Tesseract upgrade or config change invalidates entries"""
+    global _engine_config
+    if _engine_config is None:
+        try:
+            tesseract_version = str(load_pytesseract().get_tesseract_version())
+        except Exception:
+            tesseract_version = "unknown"
+        _engine_config = f"tesseract {tesseract_version} {TESSERACT_CONFIG}|easyocr en"
+    return _engine_config
+
+def get_ocr_stats() -> Dict:
+    """Get EasyOCR load time, per-page latency and OCR cache counters for this process"""
+    return {
+        "cache": get_ocr_cache_stats(),
+        "easyocr_loaded": _easyocr_reader is not None,
+        "easyocr_load_seconds": round(_easyocr_load_seconds, 3) if _easyocr_load_seconds is not None else None,
+        "stuck_threads": stuck_ocr_threads(),
+        "pages_skipped_threads_stuck": _stuck_skipped_pages,
+        "render_dpi": render_dpi.snapshot(),
+        "tesseract_page_ms": tesseract_latency_ms.snapshot(),
+        "easyocr_page_ms": easyocr_latency_ms.snapshot()
+    }
+
+def pixmap_samples(pix: "fitz.Pixmap"):
+    """Raw pixel buffer of a pixmap, without a copy where PyMuPDF supports it"""
+    samples = getattr(pix, "samples_mv", None)
+    return samples if samples is not None else pix.samples
+
+def is_tesseract_timeout(error: Exception) -> bool:
+    """pytesseract signals a timeout with a bare RuntimeError (TesseractError is a subclass)"""
+    return isinstance(error, RuntimeError) and not isinstance(error, load_pytesseract().TesseractError) \
+        and "timeout" in str(error).lower()
+
+_ocr_executor: Optional[ThreadPoolExecutor] = None
+_ocr_executor_lock = threading.Lock()
+
+# Abandoned pages whose OCR call is still running; each holds an executor thread until it returns
+_stuck_futures: Set[Future] = set()
+_stuck_lock = threading.Lock()
+_stuck_skipped_pages = 0
+
+def stuck_ocr_threads() -> int:
+    """OCR threads still busy with abandoned pages"""
+    with _stuck_lock:
+        _stuck_futures.difference_update([future for future in _stuck_futures if future.done()])
+        return len(_stuck_futures)
+
+def get_ocr_executor(workers: int) -> ThreadPoolExecutor:
+    """Get the process-wide OCR thread pool (Tesseract runs as a subprocess, so threads suffice)"""
+    global _ocr_executor
+    with _ocr_executor_lock:
+        if _ocr_executor is None:
+            _ocr_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr")
+        return _ocr_executor
+
+class OCRService:
+    """Renders OCR candidate pages and recognises them concurrently"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.workers = self.settings.ocr_workers or default_ocr_workers()
+        self.page_timeout = self.settings.ocr_page_timeout_seconds
+        self.cache = get_ocr_cache() if self.settings.ocr_cache_enabled else None
+
+    def ocr_pdf_pages(self, doc: "fitz.Document", page_indexes: Iterable[int],
+                      filename: str) -> Dict[int, Tuple[str, float, Dict[str, float]]]:
+        """OCR the given pages of an open PDF, returning {page index: (text, confidence, stage timings)}"""
+        global _stuck_skipped_pages
+        executor = get_ocr_executor(self.workers)
+        page_iter = iter(page_indexes)
+        pending: Dict[Future, int] = {}
+        started: Dict[int, float] = {}
+        cache_keys: Dict[int, str] = {}
+        render_seconds: Dict[int, float] = {}
+        results: Dict[int, Tuple[str, float, Dict[str, float]]] = {}
+        skipped = 0
+
+        def submit_next() -> bool:
+            for page_index in page_iter:
+                start_time = time.perf_counter()
+                try:
+                    pix = self._render_page(doc[page_index])
+                except Exception as e:
+                    logger.error(f"Failed to render page {page_index + 1} of {filename} for OCR: {e}")
+                    continue
+                render_seconds[page_index] = time.perf_counter() - start_time
+
+                # Unchanged page images skip OCR entirely
+                if self.cache is not None:
+                    cache_keys[page_index] = self.cache.make_key(get_engine_config(), pixmap_samples(pix))
+                    cached = self.cache.get(cache_keys[page_index])
+                    if cached is not None:
+                        results[page_index] = (cached["text"], cached["confidence"], {"render": render_seconds[page_index], "ocr": 0.0})
+                        continue
+
+                pending[executor.submit(self._ocr_image, pix, page_index, filename, started)] = page_index
+                return True
+            return False
+
+        while len(pending) < self._window() and submit_next():
+            pass
+
+        while pending:
+            done, _ = wait(pending, timeout=self._next_timeout(pending, started), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                page_index = pending.pop(future)
+                try:
+                    ocr_text, confidence, engine, ocr_seconds = future.result()
+                except Exception as e:
+                    logger.error(f"OCR failed for page {page_index + 1} in {filename}: {e}")
+                    continue
+
+                results[page_index] = (ocr_text, confidence, {"render": render_seconds[page_index], "ocr": ocr_seconds})
+                # Timeouts and double failures are not cached so the page is retried next time
+                if engine and page_index in cache_keys:
+                    self.cache.put(cache_keys[page_index], ocr_text, confidence, engine)
+
+            # Abandon pages that have been running past their timeout so the document can finish
+            if self.page_timeout:
+                now = time.monotonic()
+                for future, page_index in list(pending.items()):
+                    if page_index in started and now - started[page_index] > self._abandon_after():
+                        logger.warning(f"OCR abandoned after {self._abandon_after():.1f}s for page {page_index + 1} in {filename}")
+                        pending.pop(future)
+                        with _stuck_lock:
+                            _stuck_futures.add(future)
+
+            # Every thread is held by an abandoned page: queued pages would never start
+            if not self._window():
+                for future, page_index in list(pending.items()):
+                    if future.cancel():
+                        pending.pop(future)
+                        skipped += 1
+
+            while len(pending) < self._window() and submit_next():
+                pass
+
+        skipped += sum(1 for _ in page_iter)
+        if skipped:
+            with _stuck_lock:
+                _stuck_skipped_pages += skipped
+            logger.error(f"OCR skipped {skipped} pages of {filename}: all {self.workers} OCR threads are stuck on abandoned pages")
+
+        return results
+
+    def _window(self) -> int:
+        """Pages to keep rendered ahead: a couple per OCR thread not held by an abandoned page"""
+        return max(self.workers - stuck_ocr_threads(), 0) * 2
+
+    def _next_timeout(self, pending: Dict[Future, int], started: Dict[int, float]) -> Optional[float]:
+        """Time until the oldest running page hits its timeout"""
+        if not self.page_timeout:
+            return None
+        running = [started[page_index] for page_index in pending.values() if page_index in started]
+        if not running:
+            return self.page_timeout
+        return max(min(running) + self._abandon_after() - time.monotonic(), 0.0) + 0.01
+
+    def _abandon_after(self) -> float:
+        """Seconds a page may run before the document stops waiting for it"""
+        return self.page_timeout * ABANDON_AFTER_TIMEOUTS
+
+    def _render_page(self, page: "fitz.Page") -> "fitz.Pixmap":
+        """Rasterise a page to 8-bit grayscale (runs on the caller's thread; PyMuPDF is not thread-safe)"""
+        fitz = load_fitz()
+        dpi = self.choose_dpi(page)
+        render_dpi.observe(dpi)
+        zoom = dpi / 72.0
+        return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+
+    def choose_dpi(self, page: "fitz.Page") -> int:
+        """Pick a render resolution from the page format and the resolution of its scan"""
+        width_in = page.rect.width / 72.0
+        height_in = page.rect.height / 72.0
+        area = max(width_in * height_in, 1e-6)
+
+        # Small formats (labels, receipts) carry small print; large formats (drawings) large print
+        if area <= SMALL_PAGE_SQ_IN:
+            dpi = self.settings.ocr_max_dpi
+        elif area >= LARGE_PAGE_SQ_IN:
+            dpi = self.settings.ocr_min_dpi
+        else:
+            dpi = self.settings.ocr_target_dpi
+
+        # Rendering above the scan's own resolution only adds pixels, not detail
+        native_dpi = self._native_image_dpi(page)
+        if native_dpi:
+            dpi = min(dpi, max(native_dpi, self.settings.ocr_min_dpi))
+
+        # Keep huge pages within the pixel budget
+        dpi = min(dpi, math.sqrt(self.settings.ocr_max_pixels / area))
+        return int(round(dpi))
+
+    def _native_image_dpi(self, page: "fitz.Page") -> Optional[float]:
+        """Horizontal resolution of the largest image drawn on the page, if any"""
+        fitz = load_fitz()
+        try:
+            images = [info for info in page.get_image_info() if info.get("width")]
+        except Exception:
+            return None
+        if not images:
+            return None
+
+        largest = max(images, key=lambda info: abs(fitz.Rect(info["bbox"])))
+        bbox_width_in = fitz.Rect(largest["bbox"]).width / 72.0
+        return largest["width"] / bbox_width_in if bbox_width_in > 0 else None
+
+    def _ocr_image(self, pix: "fitz.Pixmap", page_index: int, filename: str,
+                   started: Dict[int, float]) -> Tuple[str, float, Optional[str], float]:
+        """OCR one rendered page - try Tesseract first, fallback to EasyOCR; returns (text, confidence, engine, seconds)"""
+        started[page_index] = time.monotonic()
+        samples = pixmap_samples(pix)
+        # Wrap the pixmap's grayscale samples directly - no PNG encode/decode round-trip
+        image = load_pil_image().frombuffer("L", (pix.width, pix.height), samples, "raw", "L", pix.stride, 1)
+
+        try:
+            # Try Tesseract first (industry standard, lighter)
+            start_time = time.perf_counter()
+            ocr_text = load_pytesseract().image_to_string(image, config=TESSERACT_CONFIG, timeout=self.page_timeout or 0)
+            tesseract_latency_ms.observe((time.perf_counter() - start_time) * 1000.0)
+            engine = "tesseract"
+        except Exception as tesseract_error:
+            if is_tesseract_timeout(tesseract_error):
+                # pytesseract kills the process on timeout; a pathological page is not worth a second engine
+                logger.warning(f"Tesseract timed out after {self.page_timeout}s for page {page_index + 1} in {filename}")
+                return "", OCR_CONFIDENCE, None, time.monotonic() - started[page_index]
+            logger.warning(f"Tesseract failed for page {page_index + 1} in {filename}, falling back to EasyOCR: {tesseract_error}")
+            try:
+                # Fallback to EasyOCR (models loaded once per process)
+                reader = get_easyocr_reader()
+                start_time = time.perf_counter()
+                pixels = np.frombuffer(samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+                ocr_results = reader.readtext(pixels)
+                easyocr_latency_ms.observe((time.perf_counter() - start_time) * 1000.0)
+                ocr_text = ' '.join([result[1] for result in ocr_results])
+                engine = "easyocr"
+            except Exception as easyocr_error:
+                logger.error(f"Both Tesseract and EasyOCR failed for page {page_index + 1} in {filename}: {easyocr_error}")
+                ocr_text = ""
+                engine = None
+
+        return ocr_text.strip(), OCR_CONFIDENCE, engine, time.monotonic() - started[page_index]
@@ -0,0 +1,399 @@
+"""
+Parser Pool - Runs document parsing in worker processes
+Keeps PyMuPDF, unstructured and Tesseract off the event loop and isolates
+crashes so one malformed file cannot take down the service
+"""
+
+import asyncio
+import multiprocessing
+import os
+import pickle
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from app.models.query import ParsedDocument, ParsedPage
+from app.utils.config import get_settings
+from app.utils.logging_optimized import get_logger
+
+logger = get_logger(__name__)
+
+# Parser held by each worker process (set by the pool initializer)
+_worker_parser = None
+
+def _init_worker(pid_queue, prewarm_engines: bool, prewarm_easyocr: bool):
+    """Set up the parser once per worker process, optionally importing every engine up front"""
+    global _worker_parser
+    # Report this worker's pid so the pool can terminate it if a parse hangs
+    pid_queue.put(os.getpid())
+
+    # Each Tesseract process may only use its share of the core budget (set here, not in the API process)
+    os.environ["OMP_THREAD_LIMIT"] = str(max(get_settings().ocr_threads_per_page, 1))
+
+    from app.services.parser_service_optimized import ParserService
+    _worker_parser = ParserService()
+
+    if prewarm_engines:
+        from app.utils.lazy_imports import prewarm
+        prewarm()
+    if prewarm_easyocr:
+        from app.services.ocr_service import get_easyocr_reader
+        get_easyocr_reader()
+
+def _worker_stats() -> Tuple[int, Dict]:
+    """OCR stats and engine import times of the current worker process, keyed by pid"""
+    from app.services.ocr_service import get_ocr_stats
+    from app.utils.lazy_imports import get_import_report
+    return os.getpid(), {"ocr": get_ocr_stats(), "lazy_imports": get_import_report()}
+
+def _prewarm_in_worker() -> Tuple[None, Tuple[int, Dict]]:
+    """No-op task that makes the pool start its workers"""
+    return None, _worker_stats()
+
+def _parse_in_worker(source: Union[bytes, str], mime_type: str, filename: str,
+                     inline_max_bytes: int) -> Tuple[Union[ParsedDocument, str], Tuple[int, Dict]]:
+    """Parse a document in a worker; large inputs and results travel as temp file paths"""
+    parsed_doc = _worker_parser.parse_document(source, mime_type, filename)
+
+    # Spill big results to disk instead of pushing them through the result pipe
+    if sum(len(page.text) for page in parsed_doc.pages) <= inline_max_bytes:
+        return parsed_doc, _worker_stats()
+    fd, path = tempfile.mkstemp(prefix="docingest-parsed-", suffix=".pickle")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(parsed_doc, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path, _worker_stats()
+
+def _spool_pages_in_worker(source: Union[bytes, str], mime_type: str,
+                           filename: str) -> Tuple[Tuple[str, int], Tuple[int, Dict]]:
+    """Stream a non-PDF document's pages into a temp file, one pickled page at a time"""
+    fd, path = tempfile.mkstemp(prefix="docingest-pages-", suffix=".pickle")
+    page_count = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for page in _worker_parser.iter_pages(source, mime_type, filename):
+                pickle.dump(page, f, protocol=pickle.HIGHEST_PROTOCOL)
+                page_count += 1
+    except BaseException:
+        os.unlink(path)
+        raise
+    return (path, page_count), _worker_stats()
+
+def _count_pages_in_worker(path: str, mime_type: str) -> Tuple[Optional[int], Tuple[int, Dict]]:
+    """Count a document's pages in a worker"""
+    return _worker_parser.count_pages(path, mime_type), _worker_stats()
+
+def _parse_pages_in_worker(path: str, mime_type: str, filename: str,
+                           start_page: int, end_page: int) -> Tuple[List[ParsedPage], Tuple[int, Dict]]:
+    """Parse one window of pages in a worker, reading only that window from the file"""
+    pages = list(_worker_parser.iter_pages(path, mime_type, filename, start_page, end_page))
+    return pages, _worker_stats()
+
+class ParserPool:
+    """Process pool for document parsing with crash recovery and per-file timeouts"""
+
+    def __init__(self, workers: int, timeout_seconds: float, inline_max_bytes: int):
+        self.settings = get_settings()
+        self.workers = max(workers, 1)
+        self.timeout_seconds = timeout_seconds
+        self.inline_max_bytes = inline_max_bytes
+        self.page_window = max(self.settings.parser_page_window, 1)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._executor, self._pid_queue = self._new_executor()
+
+        self.parsed_total = 0
+        self.failed_total = 0
+        self.windows_total = 0
+        self.crashes_total = 0
+        self.timeouts_total = 0
+        self.restarts_total = 0
+        self.spilled_inputs_total = 0
+        self.parse_seconds_total = 0.0
+        self._worker_stats: Dict[int, Dict] = {}
+
+    def _new_executor(self) -> Tuple[ProcessPoolExecutor, "multiprocessing.SimpleQueue"]:
+        """Start a fresh set of worker processes, with the queue their pids are reported on"""
+        # spawn: forking a process that already runs ONNX/BLAS threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        pid_queue = context.SimpleQueue()
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(pid_queue, self.settings.parser_prewarm, self.settings.ocr_prewarm_easyocr)
+        )
+        return executor, pid_queue
+
+    def _terminate_workers(self, pid_queue: "multiprocessing.SimpleQueue"):
+        """Terminate every worker that reported its pid on the queue"""
+        pids = []
+        while not pid_queue.empty():
+            pids.append(pid_queue.get())
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except (ProcessLookupError, PermissionError):
+                pass
+        pid_queue.close()
+
+    def _restart(self, generation: int, kill: bool = False):
+        """Replace a broken or stuck pool (once per generation, however many callers saw it)"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            old_executor, old_pid_queue = self._executor, self._pid_queue
+            self._executor, self._pid_queue = self._new_executor()
+            self._generation += 1
+            self.restarts_total += 1
+
+        if kill:
+            # A hung parse never returns, so its worker has to be terminated
+            self._terminate_workers(old_pid_queue)
+        old_executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning(f"Restarted parser pool ({self.workers} workers)")
+
+    async def prewarm(self):
+        """Start the worker processes now (spawn pools launch every worker on first submit)"""
+        start_time = time.perf_counter()
+        try:
+            await self._call("prewarm", _prewarm_in_worker)
+            logger.info(f"Parser pool pre-warmed in {time.perf_counter() - start_time:.2f}s")
+        except Exception as e:
+            logger.error(f"Parser pool pre-warm failed: {e}")
+
+    def _spill(self, content: bytes) -> str:
+        """Write content to a temp file workers can read from"""
+        fd, path = tempfile.mkstemp(prefix="docingest-parse-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        self.spilled_inputs_total += 1
+        return path
+
+    async def parse(self, content: Union[bytes, str], mime_type: str, filename: str) -> ParsedDocument:
+        """Parse a whole document (bytes or a file path) in a worker process"""
+        start_time = time.perf_counter()
+        # Large downloads go through a temp file rather than the task pipe; paths are passed as-is
+        spill_path = self._spill(content) if isinstance(content, bytes) and len(content) > self.inline_max_bytes else None
+
+        try:
+            result = await self._call(
+                filename, _parse_in_worker, spill_path or content, mime_type, filename, self.inline_max_bytes
+            )
+            parsed_doc = self._load_result(result)
+            self.parsed_total += 1
+            return parsed_doc
+        except Exception:
+            self.failed_total += 1
+            raise
+        finally:
+            self.parse_seconds_total += time.perf_counter() - start_time
+            if spill_path:
+                os.unlink(spill_path)
+
+    async def iter_pages(self, content: Union[bytes, str], mime_type: str, filename: str) -> AsyncIterator[ParsedPage]:
+        """Yield a document's pages (content as bytes or a file path), holding one window of pages at a time
+
+        PDFs are parsed a window of pages per task. Other formats have no page
+        index to seek to, so the worker streams their pages into a temp file in
+        one pass and the pages are read back a window at a time.
+        """
+        if mime_type != "application/pdf":
+            async for page in self._iter_spooled_pages(content, mime_type, filename):
+                yield page
+            return
+
+        start_time = time.perf_counter()
+        # Workers open the file themselves and only read the pages of their window
+        spill_path = self._spill(content) if isinstance(content, bytes) else None
+        path = spill_path or content
+        next_window: Optional[asyncio.Future] = None
+        try:
+            total_pages = await self._call(filename, _count_pages_in_worker, path, mime_type)
+            starts = list(range(0, total_pages, self.page_window))
+
+            def submit(start: int) -> asyncio.Future:
+                return asyncio.ensure_future(self._call(
+                    filename, _parse_pages_in_worker, path, mime_type, filename,
+                    start, min(start + self.page_window, total_pages)
+                ))
+
+            # Keep the next window parsing while the caller consumes the current one
+            next_window = submit(starts[0]) if starts else None
+            for i in range(len(starts)):
+                window = next_window
+                next_window = submit(starts[i + 1]) if i + 1 < len(starts) else None
+                pages = await window
+                self.windows_total += 1
+                for page in pages:
+                    yield page
+
+            self.parsed_total += 1
+        except Exception:
+            self.failed_total += 1
+            raise
+        finally:
+            # Stop (or collect the failure of) the prefetched window
+            if next_window is not None:
+                next_window.cancel()
+                try:
+                    await next_window
+                except (asyncio.CancelledError, Exception):
+                    pass
+            self.parse_seconds_total += time.perf_counter() - start_time
+            if spill_path:
+                os.unlink(spill_path)
+
+    async def _iter_spooled_pages(self, content: Union[bytes, str], mime_type: str,
+                                  filename: str) -> AsyncIterator[ParsedPage]:
+        """Yield the pages a worker spooled to disk, reading one window per thread hop"""
+        start_time = time.perf_counter()
+        spill_path = self._spill(content) if isinstance(content, bytes) and len(content) > self.inline_max_bytes else None
+        pages_path = None
+        try:
+            pages_path, total_pages = await self._call(
+                filename, _spool_pages_in_worker, spill_path or content, mime_type, filename
+            )
+            with open(pages_path, "rb") as f:
+                for start in range(0, total_pages, self.page_window):
+                    count = min(self.page_window, total_pages - start)
+                    pages = await asyncio.to_thread(lambda: [pickle.load(f) for _ in range(count)])
+                    self.windows_total += 1
+                    for page in pages:
+                        yield page
+
+            self.parsed_total += 1
+        except Exception:
+            self.failed_total += 1
+            raise
+        finally:
+            self.parse_seconds_total += time.perf_counter() - start_time
+            for path in (spill_path, pages_path):
+                if path:
+                    os.unlink(path)
+
+    async def _call(self, filename: str, fn, *args):
+        """Run a worker function; a crash also fails innocent tasks sharing the pool, so retry once"""
+        for attempt in range(2):
+            try:
+                result, (pid, worker_stats) = await self._submit(filename, fn, *args)
+                self._worker_stats[pid] = worker_stats
+                return result
+            except BrokenProcessPool:
+                self.crashes_total += 1
+                if attempt == 1:
+                    raise Exception(f"Parser worker crashed while parsing {filename}")
+                logger.warning(f"Parser worker crashed while parsing {filename}, retrying on a fresh pool")
+
+    async def _submit(self, filename: str, fn, *args):
+        """Run one task on the current pool, restarting it on crash or timeout"""
+        generation = self._generation
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, fn, *args)
+        except BrokenProcessPool:
+            self._restart(generation)
+            raise
+
+        try:
+            return await asyncio.wait_for(future, self.timeout_seconds or None)
+        except asyncio.TimeoutError:
+            self.timeouts_total += 1
+            self._restart(generation, kill=True)
+            raise Exception(f"Parsing {filename} timed out after {self.timeout_seconds}s")
+        except BrokenProcessPool:
+            self._restart(generation)
+            raise
+
+    def _load_result(self, result: Union[ParsedDocument, str]) -> ParsedDocument:
+        """Read a result that was spilled to disk"""
+        if isinstance(result, ParsedDocument):
+            return result
+        try:
+            with open(result, "rb") as f:
+                return pickle.load(f)
+        finally:
+            os.unlink(result)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self) -> Dict:
+        """Get pool configuration and parse/crash counters"""
+        return {
+            "workers": self.workers,
+            "timeout_seconds": self.timeout_seconds,
+            "inline_max_bytes": self.inline_max_bytes,
+            "page_window": self.page_window,
+            "parsed_total": self.parsed_total,
+            "failed_total": self.failed_total,
+            "windows_total": self.windows_total,
+            "crashes_total": self.crashes_total,
+            "timeouts_total": self.timeouts_total,
+            "restarts_total": self.restarts_total,
+            "spilled_inputs_total": self.spilled_inputs_total,
+            "avg_parse_seconds": round(self.parse_seconds_total / self.parsed_total, 3) if self.parsed_total else 0.0,
+            # OCR and engine import stats as last reported by each worker process
+            "per_worker": [{"pid": pid, **stats} for pid, stats in self._worker_stats.items()]
+        }
+
+_parser_pool: Optional[ParserPool] = None
+
+def get_parser_pool() -> Optional[ParserPool]:
+    """Get the process-wide parser pool (None when disabled)"""
+    global _parser_pool
+    settings = get_settings()
+    if settings.parser_workers <= 0:
+        return None
+    if _parser_pool is None:
+        _parser_pool = ParserPool(
+            workers=settings.parser_workers,
+            timeout_seconds=settings.parser_timeout_seconds,
+            inline_max_bytes=settings.parser_inline_max_bytes
+        )
+        logger.info(f"Started parser pool ({_parser_pool.workers} processes)")
+    return _parser_pool
+
+def get_parser_pool_stats() -> Optional[Dict]:
+    """Get parser pool stats without starting the pool"""
+    return _parser_pool.get_stats() if _parser_pool is not None else None
+
+async def parse_document(content: Union[bytes, str], mime_type: str, filename: str) -> ParsedDocument:
+    """Parse off the event loop: in the process pool, or a thread when the pool is disabled"""
+    pool = get_parser_pool()
+    if pool is not None:
+        return await pool.parse(content, mime_type, filename)
+
+    from app.services.parser_service_optimized import ParserService
+    return await asyncio.to_thread(ParserService().parse_document, content, mime_type, filename)
+
+async def iter_document_pages(content: Union[bytes, str], mime_type: str, filename: str) -> AsyncIterator[ParsedPage]:
+    """Stream a document's pages (content as bytes or a file path) off the event loop, a window at a time"""
+    pool = get_parser_pool()
+    if pool is not None:
+        async for page in pool.iter_pages(content, mime_type, filename):
+            yield page
+        return
+
+    from app.services.parser_service_optimized import ParserService
+    settings = get_settings()
+    pages = ParserService().iter_pages(content, mime_type, filename)
+    # Without the pool, advance the page generator one window per thread hop
+    while True:
+        window = await asyncio.to_thread(lambda: list(islice(pages, max(settings.parser_page_window, 1))))
+        if not window:
+            break
+        for page in window:
+            yield page
+
+def shutdown_parser_pool():
+    """Shut down the parser pool (called on shutdown)"""
+    global _parser_pool
+    if _parser_pool is not None:
+        _parser_pool.shutdown()
+        _parser_pool = None
@@ -1,29 +1,29 @@
-from unstructured.partition.pdf import partition_pdf
-from unstructured.partition.docx import partition_docx
-from unstructured.partition.text import partition_text
-import pytesseract
-import easyocr
-from PIL import Image
+import csv
 import io
-import fitz  # PyMuPDF
-from typing import List, Dict, Tuple
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import time
 from app.models.query import ParsedDocument, ParsedPage
+from app.services.docx_engine import PAGE_BREAK, has_page_markers, iter_docx_blocks
+from app.services.ocr_service import OCRService
 from app.utils.config import get_settings
+from app.utils.lazy_imports import load_fitz, load_partition_docx
 from app.utils.logging_optimized import get_logger, log_error
+from app.utils.metrics import StageTimer
 from app.utils.security import chunk_text
 
-# Tesseract OCR Configuration
-import os
-import pytesseract
-
-# Set Tesseract path
-pytesseract.pytesseract.tesseract_cmd = "/var/www/vhosts/old.industrialwebworks.net/mamba/envs/docingest/bin/tesseract"
-os.environ.setdefault("TESSDATA_PREFIX", "/var/www/vhosts/old.industrialwebworks.net/mamba/envs/docingest/share/tessdata")
+# Heavy engines (PyMuPDF, unstructured, Tesseract, EasyOCR) are imported on first use
+# per format - see app/utils/lazy_imports.py
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF
 
+logger = get_logger(__name__)
 
+# Bump when parsing or chunking output changes so incremental re-ingest reprocesses every document
+PARSER_VERSION = "3"
 
-logger = get_logger(__name__)
+TEXT_PAGE_CHARS = 2000  # Approximate page size for formats without pages
+CSV_SNIFF_CHARS = 64 * 1024  # Sample used to detect the CSV dialect
 
 class ParserService:
     """Document parsing and OCR service"""
@@ -31,108 +31,162 @@ class ParserService:
     def __init__(self):
         self.settings = get_settings()
         self.ocr_enabled = True
+        self.ocr_service = OCRService()
     
-    def parse_document(self, content: bytes, mime_type: str, filename: str) -> ParsedDocument:
+    def parse_document(self, content: Union[bytes, str], mime_type: str, filename: str) -> ParsedDocument:
         """Parse document and extract text with page information"""
         start_time = time.time()
         
+        try:
+            pages = list(self.iter_pages(content, mime_type, filename))
+            timer = StageTimer()
+            for page in pages:
+                timer.merge(page.timings)
+            
+            return ParsedDocument(
+                doc_id=filename,
+                title=filename,
+                mime_type=mime_type,
+                pages=pages,
+                total_pages=len(pages),
+                processing_time=time.time() - start_time,
+                timings=timer.as_dict()
+            )
+        finally:
+            processing_time = time.time() - start_time
+            logger.info(f"Document {filename} processed in {processing_time:.2f} seconds")
+    
+    def iter_pages(self, content: Union[bytes, str], mime_type: str, filename: str,
+                   start_page: int = 0, end_page: Optional[int] = None) -> Iterator[ParsedPage]:
+        """Yield parsed pages as they are produced (content may be bytes or a file path)"""
         try:
             if mime_type == "application/pdf":
-                return self._parse_pdf(content, filename)
+                yield from self._iter_pdf_pages(content, filename, start_page, end_page)
             elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                return self._parse_docx(content, filename)
-            elif mime_type in ["text/plain", "text/csv"]:
-                return self._parse_text(content, filename)
+                if self.settings.docx_engine == "unstructured":
+                    docx_pages = self._iter_docx_pages(self._read(content), filename)
+                else:
+                    docx_pages = self._iter_docx_pages_native(content, filename)
+                yield from self._timed(islice(docx_pages, start_page, end_page))
+            elif mime_type == "text/csv":
+                yield from self._timed(islice(self._iter_csv_pages(content, filename), start_page, end_page))
+            elif mime_type == "text/plain":
+                yield from self._timed(islice(self._iter_text_pages(content, filename), start_page, end_page))
             else:
                 raise Exception(f"Unsupported MIME type: {mime_type}")
                 
         except Exception as e:
             log_error(e, f"Error parsing document {filename}")
             raise Exception(f"Failed to parse document: {e}")
+    
+    def _timed(self, pages: Iterator[ParsedPage]) -> Iterator[ParsedPage]:
+        """Record the time spent producing each page as its extract stage"""
+        while True:
+            start_time = time.perf_counter()
+            page = next(pages, None)
+            if page is None:
+                return
+            page.timings.setdefault("extract", time.perf_counter() - start_time)
+            yield page
+    
+    def count_pages(self, content: Union[bytes, str], mime_type: str) -> Optional[int]:
+        """Number of pages up front, where the format has real pages (PDF only)"""
+        if mime_type != "application/pdf":
+            return None
+        doc = self._open_pdf(content)
+        try:
+            return len(doc)
         finally:
-            processing_time = time.time() - start_time
-            logger.info(f"Document {filename} processed in {processing_time:.2f} seconds")
+            doc.close()
+    
+    def _read(self, content: Union[bytes, str]) -> bytes:
+        """Load content given as a file path"""
+        if isinstance(content, str):
+            with open(content, "rb") as f:
+                return f.read()
+        return content
+    
+    def _open_text(self, content: Union[bytes, str], newline: Optional[str] = None) -> io.TextIOWrapper:
+        """Incrementally decoding text stream over bytes or a file path (never decodes the whole payload)"""
+        raw = open(content, "rb") if isinstance(content, str) else io.BytesIO(content)
+        return io.TextIOWrapper(raw, encoding="utf-8-sig", errors="ignore", newline=newline)
+    
+    def _open_pdf(self, content: Union[bytes, str]) -> "fitz.Document":
+        """Open a PDF from bytes or a file path (a path lets PyMuPDF read pages lazily)"""
+        fitz = load_fitz()
+        if isinstance(content, str):
+            return fitz.open(content, filetype="pdf")
+        return fitz.open(stream=content, filetype="pdf")
     
-    def _parse_pdf(self, content: bytes, filename: str) -> ParsedDocument:
-        """Parse PDF document"""
+    def _iter_pdf_pages(self, content: Union[bytes, str], filename: str,
+                        start_page: int = 0, end_page: Optional[int] = None) -> Iterator[ParsedPage]:
+        """Yield PDF pages, a window at a time so OCR can run across each window's pages"""
         try:
             # Use PyMuPDF for better page-by-page processing
-            doc = fitz.open(stream=content, filetype="pdf")
-            pages = []
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # Extract text
-                text = page.get_text()
-                has_text = len(text.strip()) > 0
-                
-                parsed_page = ParsedPage(
-                    page_number=page_num + 1,
-                    text=text.strip(),
-                    has_text=has_text,
-                    needs_ocr=False,
-                    confidence=None
-                )
-                
-                # If no text, try OCR
-                if not has_text and self.ocr_enabled:
-                    try:
-                        # Convert page to image
-                        mat = fitz.Matrix(2.0, 2.0)  # Scale factor
-                        pix = page.get_pixmap(matrix=mat)
-                        img_data = pix.tobytes("png")
-                        
-                        # Perform OCR - try Tesseract first, fallback to EasyOCR
-                        image = Image.open(io.BytesIO(img_data))
-                        
-                        try:
-                            # Try Tesseract first (industry standard, lighter)
-                            ocr_text = pytesseract.image_to_string(image, config='--oem 1 --psm 6')
-                        except Exception as tesseract_error:
-                            logger.warning(f"Tesseract failed for page {page_num + 1} in {filename}, falling back to EasyOCR: {tesseract_error}")
-                            try:
-                                # Fallback to EasyOCR
-                                reader = easyocr.Reader(['en'])
-                                ocr_results = reader.readtext(img_data)
-                                ocr_text = ' '.join([result[1] for result in ocr_results])
-                            except Exception as easyocr_error:
-                                logger.error(f"Both Tesseract and EasyOCR failed for page {page_num + 1} in {filename}: {easyocr_error}")
-                                ocr_text = ""
-                        
-                        parsed_page.text = ocr_text.strip()
-                        parsed_page.has_text = len(ocr_text.strip()) > 0
-                        parsed_page.needs_ocr = True
-                        parsed_page.confidence = 0.8  # Default confidence
-                        
-                    except Exception as ocr_error:
-                        log_error(ocr_error, f"OCR failed for page {page_num + 1} in {filename}")
+            doc = self._open_pdf(content)
+            try:
+                end_page = len(doc) if end_page is None else min(end_page, len(doc))
+                window = max(self.settings.parser_page_window, 1)
                 
-                pages.append(parsed_page)
-            
-            doc.close()
-            
-            return ParsedDocument(
-                doc_id=filename,
-                title=filename,
-                mime_type="application/pdf",
-                pages=pages,
-                total_pages=len(pages),
-                processing_time=time.time() - time.time()
-            )
+                for window_start in range(start_page, end_page, window):
+                    yield from self._parse_pdf_window(doc, filename, window_start, min(window_start + window, end_page))
+            finally:
+                doc.close()
             
         except Exception as e:
             log_error(e, f"Error parsing PDF {filename}")
             raise
     
-    def _parse_docx(self, content: bytes, filename: str) -> ParsedDocument:
-        """Parse DOCX document"""
+    def _parse_pdf_window(self, doc: "fitz.Document", filename: str, start_page: int, end_page: int) -> List[ParsedPage]:
+        """Extract text from a range of PDF pages, OCRing the image-only ones"""
+        pages = []
+        ocr_candidates = []
+        
+        for page_num in range(start_page, end_page):
+            page = doc[page_num]
+            
+            # Extract text
+            start_time = time.perf_counter()
+            text = page.get_text()
+            has_text = len(text.strip()) > 0
+            
+            parsed_page = ParsedPage(
+                page_number=page_num + 1,
+                text=text.strip(),
+                has_text=has_text,
+                needs_ocr=False,
+                confidence=None,
+                timings={"extract": time.perf_counter() - start_time}
+            )
+            
+            # If no text, queue the page for OCR
+            if not has_text and self.ocr_enabled:
+                ocr_candidates.append(page_num)
+            
+            pages.append(parsed_page)
+        
+        # OCR image-only pages concurrently; results come back keyed by page
+        if ocr_candidates:
+            logger.info(f"OCR on {len(ocr_candidates)} of pages {start_page + 1}-{end_page} in {filename}")
+            ocr_results = self.ocr_service.ocr_pdf_pages(doc, ocr_candidates, filename)
+            for page_num, (ocr_text, confidence, timings) in ocr_results.items():
+                parsed_page = pages[page_num - start_page]
+                parsed_page.text = ocr_text
+                parsed_page.has_text = len(ocr_text) > 0
+                parsed_page.needs_ocr = True
+                parsed_page.confidence = confidence
+                parsed_page.timings.update(timings)
+        
+        return pages
+    
+    def _iter_docx_pages(self, content: bytes, filename: str) -> Iterator[ParsedPage]:
+        """Yield DOCX pages"""
         try:
             # Use unstructured for DOCX parsing
+            partition_docx = load_partition_docx()
             elements = partition_docx(file=io.BytesIO(content))
             
             # Group elements by page (approximate)
-            pages = []
             current_page_text = ""
             page_num = 1
             
@@ -143,107 +197,195 @@ class ParserService:
                     
                     # Simple page break detection (can be improved)
                     if len(current_page_text) > 2000:  # Arbitrary page size
-                        pages.append(ParsedPage(
+                        yield ParsedPage(
                             page_number=page_num,
                             text=current_page_text.strip(),
                             has_text=True,
                             needs_ocr=False
-                        ))
+                        )
                         current_page_text = ""
                         page_num += 1
             
             # Add remaining text as last page
             if current_page_text.strip():
-                pages.append(ParsedPage(
+                yield ParsedPage(
                     page_number=page_num,
                     text=current_page_text.strip(),
                     has_text=True,
                     needs_ocr=False
-                ))
-            
-            return ParsedDocument(
-                doc_id=filename,
-                title=filename,
-                mime_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                pages=pages,
-                total_pages=len(pages),
-                processing_time=time.time() - time.time()
-            )
+                )
             
         except Exception as e:
             log_error(e, f"Error parsing DOCX {filename}")
             raise
     
-    def _parse_text(self, content: bytes, filename: str) -> ParsedDocument:
-        """Parse plain text document"""
+    def _iter_docx_pages_native(self, content: Union[bytes, str], filename: str) -> Iterator[ParsedPage]:
+        """Yield DOCX pages streamed from the package zip, split at the document's own page breaks"""
         try:
-            text = content.decode('utf-8', errors='ignore')
-            
-            # Split into pages (simple approach)
-            lines = text.split('\n')
-            pages = []
-            current_page_text = ""
+            # Documents without recorded breaks fall back to approximate 2000-char pages
+            honour_breaks = has_page_markers(content)
+            page_blocks = []
+            page_size = 0
             page_num = 1
             
-            for line in lines:
-                current_page_text += line + "\n"
+            for block in iter_docx_blocks(content):
+                if block is PAGE_BREAK:
+                    # Consecutive breaks (e.g. a hard break followed by Word's rendered marker) count once
+                    if honour_breaks and page_blocks:
+                        yield self._docx_page(page_num, page_blocks)
+                        page_blocks = []
+                        page_size = 0
+                        page_num += 1
+                    continue
                 
-                # Simple page break detection
-                if len(current_page_text) > 2000:  # Arbitrary page size
-                    pages.append(ParsedPage(
-                        page_number=page_num,
-                        text=current_page_text.strip(),
-                        has_text=True,
-                        needs_ocr=False
-                    ))
-                    current_page_text = ""
+                page_blocks.append(block)
+                page_size += len(block) + 1
+                if not honour_breaks and page_size > 2000:  # Arbitrary page size
+                    yield self._docx_page(page_num, page_blocks)
+                    page_blocks = []
+                    page_size = 0
                     page_num += 1
             
             # Add remaining text as last page
-            if current_page_text.strip():
-                pages.append(ParsedPage(
-                    page_number=page_num,
-                    text=current_page_text.strip(),
-                    has_text=True,
-                    needs_ocr=False
-                ))
+            if page_blocks:
+                yield self._docx_page(page_num, page_blocks)
             
-            return ParsedDocument(
-                doc_id=filename,
-                title=filename,
-                mime_type="text/plain",
-                pages=pages,
-                total_pages=len(pages),
-                processing_time=time.time() - time.time()
-            )
+        except Exception as e:
+            log_error(e, f"Error parsing DOCX {filename}")
+            raise
+    
+    def _docx_page(self, page_num: int, blocks: List[str]) -> ParsedPage:
+        """Build a page from its paragraph and table-row blocks"""
+        return ParsedPage(
+            page_number=page_num,
+            text="\n".join(blocks).strip(),
+            has_text=True,
+            needs_ocr=False
+        )
+    
+    def _iter_text_pages(self, content: Union[bytes, str], filename: str) -> Iterator[ParsedPage]:
+        """Yield plain text pages, streaming the file line by line"""
+        try:
+            with self._open_text(content) as stream:
+                page_lines = []
+                page_size = 0
+                page_num = 1
+                
+                # readline is capped so a file with no newlines still streams in bounded pieces
+                for line in iter(lambda: stream.readline(TEXT_PAGE_CHARS), ""):
+                    page_lines.append(line)
+                    page_size += len(line)
+                    
+                    # Simple page break detection
+                    if page_size > TEXT_PAGE_CHARS:
+                        page_text = "".join(page_lines).strip()
+                        if page_text:
+                            yield self._text_page(page_num, page_text)
+                            page_num += 1
+                        page_lines = []
+                        page_size = 0
+                
+                # Add remaining text as last page
+                page_text = "".join(page_lines).strip()
+                if page_text:
+                    yield self._text_page(page_num, page_text)
             
         except Exception as e:
             log_error(e, f"Error parsing text file {filename}")
             raise
     
+    def _iter_csv_pages(self, content: Union[bytes, str], filename: str) -> Iterator[ParsedPage]:
+        """Yield CSV pages of whole rows, each sized to one chunk and starting with the header row"""
+        try:
+            with self._open_text(content, newline="") as stream:
+                # Only the delimiter is sniffed: the Sniffer often misses doubled quotes ("")
+                sample = stream.read(CSV_SNIFF_CHARS)
+                try:
+                    delimiter = csv.Sniffer().sniff(sample).delimiter
+                except csv.Error:
+                    delimiter = ","
+                stream.seek(0)
+                
+                reader = csv.reader(stream, delimiter=delimiter)
+                header = next(reader, None)
+                if header is None:
+                    return
+                
+                # Rows are re-serialised one at a time so quoted fields survive intact
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+                
+                def to_line(row: List[str]) -> str:
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerow(row)
+                    return buffer.getvalue()
+                
+                header_line = to_line(header)
+                page_rows = []
+                page_size = len(header_line)
+                page_num = 1
+                
+                for row in reader:
+                    if not any(field.strip() for field in row):
+                        continue
+                    line = to_line(row)
+                    if page_rows and page_size + len(line) > self.settings.chunk_size:
+                        yield self._text_page(page_num, (header_line + "".join(page_rows)).strip())
+                        page_num += 1
+                        page_rows = []
+                        page_size = len(header_line)
+                    page_rows.append(line)
+                    page_size += len(line)
+                
+                if page_rows or page_num == 1:
+                    yield self._text_page(page_num, (header_line + "".join(page_rows)).strip())
+            
+        except Exception as e:
+            log_error(e, f"Error parsing CSV file {filename}")
+            raise
+    
+    def _text_page(self, page_num: int, text: str) -> ParsedPage:
+        """Build a page of extracted text"""
+        return ParsedPage(
+            page_number=page_num,
+            text=text,
+            has_text=len(text) > 0,
+            needs_ocr=False
+        )
+    
     def chunk_document(self, parsed_doc: ParsedDocument) -> List[Dict]:
         """Chunk document into smaller pieces for embedding"""
-        chunks = []
-        
-        for page in parsed_doc.pages:
+        return list(self.chunk_pages(parsed_doc.pages, parsed_doc.doc_id, parsed_doc.title, parsed_doc.mime_type))
+    
+    def chunk_pages(self, pages: Iterable[ParsedPage], doc_id: str, title: str, mime_type: str) -> Iterator[Dict]:
+        """Yield chunks page by page, so a page stream can be chunked without holding the document"""
+        for page in pages:
             if not page.has_text:
                 continue
             
-            # Split page text into chunks
-            page_chunks = chunk_text(page.text, self.settings.chunk_size, self.settings.chunk_overlap)
+            # Split page text into chunks (CSV pages are already one chunk of whole rows,
+            # unless a single row is longer than a chunk)
+            if mime_type == "text/csv" and len(page.text) <= self.settings.chunk_size:
+                page_chunks = [page.text]
+            else:
+                if mime_type == "text/csv":
+                    logger.warning(
+                        f"CSV page {page.page_number} of {title} has a row longer than the chunk size "
+                        f"({len(page.text)} > {self.settings.chunk_size} chars); splitting it mid-row"
+                    )
+                page_chunks = chunk_text(page.text, self.settings.chunk_size, self.settings.chunk_overlap)
             
             for chunk_idx, chunk_content in enumerate(page_chunks):
                 chunk_data = {
                     "tenant": "",  # Will be set by caller
-                    "doc_id": parsed_doc.doc_id,
-                    "title": parsed_doc.title,
+                    "doc_id": doc_id,
+                    "title": title,
                     "drive_path": "",  # Will be set by caller
-                    "mime_type": parsed_doc.mime_type,
+                    "mime_type": mime_type,
                     "page": page.page_number,
                     "chunk_idx": chunk_idx,
                     "sha256": "",  # Will be set by caller
                     "text": chunk_content
                 }
-                chunks.append(chunk_data)
-        
-        return chunks
+                yield chunk_data
@@ -1,7 +1,8 @@
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, HasIdCondition
 from typing import List, Dict, Optional
 import uuid
+import numpy as np
 from app.utils.config import get_settings
 from app.utils.logging_optimized import get_logger, log_error
 from app.utils.security import get_collection_name
@@ -28,16 +29,25 @@ class QdrantService:
             log_error(e, "Failed to connect to Qdrant")
             raise Exception(f"Failed to connect to Qdrant: {e}")
     
-    def create_collection(self, tenant: str) -> bool:
-        """Create tenant-specific collection"""
+    def create_collection(self, tenant: str, vector_size: Optional[int] = None) -> bool:
+        """Create tenant-specific collection, or validate the existing one's vector size"""
         try:
             collection_name = get_collection_name(tenant)
+            vector_size = vector_size or self.settings.embedding_dimension
             
             # Check if collection already exists
             collections = self.client.get_collections()
             existing_collections = [col.name for col in collections.collections]
             
             if collection_name in existing_collections:
+                existing_size = self.get_vector_size(tenant)
+                if existing_size is not None and existing_size != vector_size:
+                    logger.error(
+                        f"Collection {collection_name} stores {existing_size}-dim vectors but the "
+                        f"embedding model produces {vector_size}-dim vectors; re-create the collection "
+                        f"or switch back to the original model"
+                    )
+                    return False
                 logger.info(f"Collection {collection_name} already exists")
                 return True
             
@@ -45,18 +55,53 @@ class QdrantService:
             self.client.create_collection(
                 collection_name=collection_name,
                 vectors_config=VectorParams(
-                    size=self.settings.embedding_dimension,
+                    size=vector_size,
                     distance=Distance.COSINE
                 )
             )
             
-            logger.info(f"Created collection {collection_name} for tenant {tenant}")
+            logger.info(f"Created collection {collection_name} ({vector_size} dims) for tenant {tenant}")
             return True
             
         except Exception as e:
             log_error(e, f"Error creating collection for tenant {tenant}")
             return False
     
+    def get_vector_size(self, tenant: str) -> Optional[int]:
+        """Get the vector size configured on a tenant collection"""
+        try:
+            collection_info = self.client.get_collection(get_collection_name(tenant))
+            vectors = collection_info.config.params.vectors
+            # Single unnamed vector config (named vectors are not used by this service)
+            if isinstance(vectors, VectorParams):
+                return vectors.size
+            return None
+        except Exception as e:
+            log_error(e, f"Error reading vector size for tenant {tenant}")
+            return None
+    
+    def _point_id(self, chunk: Dict) -> str:
+        """Generate unique point ID based on content"""
+        return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{chunk['doc_id']}_{chunk['page']}_{chunk['chunk_idx']}_{chunk['sha256']}"))
+    
+    def point_ids(self, chunks: List[Dict]) -> List[str]:
+        """Point IDs the given chunks are stored under"""
+        return [self._point_id(chunk) for chunk in chunks]
+    
+    def _chunk_payload(self, chunk: Dict) -> Dict:
+        """Build the stored payload for a chunk"""
+        return {
+            "tenant": chunk['tenant'],
+            "doc_id": chunk['doc_id'],
+            "title": chunk['title'],
+            "drive_path": chunk['drive_path'],
+            "mime_type": chunk['mime_type'],
+            "page": chunk['page'],
+            "chunk_idx": chunk['chunk_idx'],
+            "sha256": chunk['sha256'],
+            "text": chunk['text']
+        }
+    
     def upsert_chunks(self, tenant: str, chunks: List[Dict]) -> bool:
         """Upsert document chunks to vector database"""
         try:
@@ -65,23 +110,10 @@ class QdrantService:
             # Prepare points for upsertion
             points = []
             for chunk in chunks:
-                # Generate unique point ID based on content
-                point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{chunk['doc_id']}_{chunk['page']}_{chunk['chunk_idx']}_{chunk['sha256']}"))
-                
                 point = PointStruct(
-                    id=point_id,
+                    id=self._point_id(chunk),
                     vector=chunk['embedding'],
-                    payload={
-                        "tenant": chunk['tenant'],
-                        "doc_id": chunk['doc_id'],
-                        "title": chunk['title'],
-                        "drive_path": chunk['drive_path'],
-                        "mime_type": chunk['mime_type'],
-                        "page": chunk['page'],
-                        "chunk_idx": chunk['chunk_idx'],
-                        "sha256": chunk['sha256'],
-                        "text": chunk['text']
-                    }
+                    payload=self._chunk_payload(chunk)
                 )
                 points.append(point)
             
@@ -98,6 +130,32 @@ class QdrantService:
             log_error(e, f"Error upserting chunks for tenant {tenant}")
             return False
     
+    def upsert_chunk_matrix(self, tenant: str, chunks: List[Dict], vectors: np.ndarray) -> bool:
+        """Upsert chunks whose embeddings are rows of one (n, dim) float32 matrix"""
+        try:
+            collection_name = get_collection_name(tenant)
+            
+            if len(chunks) != vectors.shape[0]:
+                raise ValueError(f"Got {len(chunks)} chunks but {vectors.shape[0]} vectors")
+            
+            # Columnar upload: the client slices the matrix per batch instead of
+            # building one PointStruct (and one Python list) per vector
+            self.client.upload_collection(
+                collection_name=collection_name,
+                vectors=np.ascontiguousarray(vectors, dtype=np.float32),
+                payload=[self._chunk_payload(chunk) for chunk in chunks],
+                ids=[self._point_id(chunk) for chunk in chunks],
+                batch_size=self.settings.qdrant_upload_batch_size,
+                wait=True
+            )
+            
+            logger.info(f"Upserted {len(chunks)} chunks for tenant {tenant}")
+            return True
+            
+        except Exception as e:
+            log_error(e, f"Error upserting chunks for tenant {tenant}")
+            return False
+    
     def search_similar(self, tenant: str, query_vector: List[float], top_k: int = 10, score_threshold: float = 0.0) -> List[Dict]:
         """Search for similar chunks"""
         try:
@@ -158,6 +216,57 @@ class QdrantService:
             log_error(e, f"Error deleting document {doc_id} for tenant {tenant}")
             return False
     
+    def update_document_payload(self, tenant: str, doc_id: str, payload: Dict) -> bool:
+        """Overwrite payload fields on every chunk of a document, leaving the vectors as they are"""
+        try:
+            collection_name = get_collection_name(tenant)
+            
+            self.client.set_payload(
+                collection_name=collection_name,
+                payload=payload,
+                points=Filter(
+                    must=[
+                        FieldCondition(
+                            key="doc_id",
+                            match=MatchValue(value=doc_id)
+                        )
+                    ]
+                ),
+                wait=True
+            )
+            
+            logger.info(f"Updated {', '.join(payload)} for document {doc_id} in tenant {tenant}")
+            return True
+            
+        except Exception as e:
+            log_error(e, f"Error updating payload of document {doc_id} for tenant {tenant}")
+            return False
+    
+    def delete_stale_chunks(self, tenant: str, doc_id: str, keep_ids: List[str]) -> bool:
+        """Delete a document's chunks except the given point IDs (the version just upserted)"""
+        try:
+            collection_name = get_collection_name(tenant)
+            
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=Filter(
+                    must=[
+                        FieldCondition(
+                            key="doc_id",
+                            match=MatchValue(value=doc_id)
+                        )
+                    ],
+                    must_not=[HasIdCondition(has_id=keep_ids)] if keep_ids else None
+                )
+            )
+            
+            logger.info(f"Deleted stale chunks for document {doc_id} in tenant {tenant} (kept {len(keep_ids)})")
+            return True
+            
+        except Exception as e:
+            log_error(e, f"Error deleting stale chunks of document {doc_id} for tenant {tenant}")
+            return False
+    
     def get_collection_info(self, tenant: str) -> Optional[Dict]:
         """Get collection information"""
         try:
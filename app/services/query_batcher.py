@@ -0,0 +1,172 @@
+"""
+Query Batcher - Coalesces concurrent query embeddings into single model calls
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.services.embedding_executor import get_embedding_executor
+from app.services.model_registry import get_model_registry, resolve_model_name
+from app.utils.config import get_settings
+from app.utils.logging_optimized import get_logger
+from app.utils.metrics import Histogram
+
+logger = get_logger(__name__)
+
+# Histogram buckets: batch sizes (items) and queue waits (milliseconds)
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+QUEUE_WAIT_BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250]
+
+class QueryBatcher:
+    """Collects in-flight queries over a short window and embeds them in one call"""
+
+    def __init__(self, model_name: str, window_ms: float, max_batch_size: int):
+        self.model_name = model_name
+        self.window_seconds = max(window_ms, 0.0) / 1000.0
+        self.max_batch_size = max(max_batch_size, 1)
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.batches_total = 0
+        self.queries_total = 0
+        self.errors_total = 0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    def _ensure_worker(self):
+        """Start the collector task on the running loop (restarting it if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # One batch in flight per inference thread; later queries gather into the next batch
+            self._slots = asyncio.Semaphore(get_embedding_executor().max_workers)
+            self._in_flight = set()
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, query: str):
+        """Embed a single query, sharing the model call with concurrent callers"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((query, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        """Collect queued queries into batches and dispatch each without waiting for it, until cancelled"""
+        while True:
+            batch = [await self._queue.get()]
+            # While every inference thread is busy, queries keep queueing and join this batch
+            await self._slots.acquire()
+            deadline = self._loop.time() + self.window_seconds
+
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already queued without waiting
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            task = self._loop.create_task(self._embed_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task):
+        """Free the batch's inference slot"""
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        """Embed a batch and fan the vectors back out to the waiting callers"""
+        started = time.perf_counter()
+        pending = [(query, future) for query, future, _ in batch if not future.cancelled()]
+
+        for _, _, enqueued in batch:
+            self.queue_wait_ms.observe((started - enqueued) * 1000.0)
+        self.batch_sizes.observe(len(batch))
+        self.batches_total += 1
+        self.queries_total += len(batch)
+
+        if not pending:
+            return
+
+        try:
+            model = get_model_registry().get_model(self.model_name)
+            # Identical queries in the same batch are embedded once
+            texts = list(dict.fromkeys(query for query, _ in pending))
+            vectors = await get_embedding_executor().run(lambda: list(model.embed(texts)))
+            by_text = dict(zip(texts, vectors))
+        except Exception as e:
+            self.errors_total += 1
+            logger.error(f"Batched query embedding failed for {len(pending)} queries: {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for query, future in pending:
+            if not future.done():
+                future.set_result(by_text[query])
+
+    async def close(self):
+        """Stop the collector task and let batches already dispatched finish"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        """Get batch-size and queue-wait histograms"""
+        return {
+            "model": self.model_name,
+            "window_ms": self.window_seconds * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches_total": self.batches_total,
+            "queries_total": self.queries_total,
+            "errors_total": self.errors_total,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches_in_flight": len(self._in_flight),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
+
+# One batcher per model, shared by every search request in the process
+_query_batchers: Dict[str, QueryBatcher] = {}
+
+def get_query_batcher(model_name: Optional[str] = None) -> QueryBatcher:
+    """Get the process-wide query batcher for a model (settings are only read to create one)"""
+    model_name = model_name or resolve_model_name()
+    batcher = _query_batchers.get(model_name)
+    if batcher is None:
+        settings = get_settings()
+        batcher = _query_batchers[model_name] = QueryBatcher(
+            model_name,
+            window_ms=settings.query_batch_window_ms,
+            max_batch_size=settings.query_batch_max_size
+        )
+    return batcher
+
+def get_query_batcher_stats() -> List[Dict]:
+    """Get stats for every active query batcher"""
+    return [batcher.get_stats() for batcher in _query_batchers.values()]
+
+async def close_query_batchers():
+    """Stop all query batchers (called on shutdown)"""
+    for batcher in _query_batchers.values():
+        await batcher.close()
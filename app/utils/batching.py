@@ -0,0 +1,16 @@
+"""
+Batching helpers for embedding inference
+"""
+
+from typing import List
+
+import numpy as np
+
+def length_sorted_order(texts: List[str]) -> np.ndarray:
+    """Indices that order texts by length so each model batch pads to similar lengths
+
+    Character length is used as a cheap proxy for token length. The sort is
+    stable, so equal-length texts keep their relative order.
+    """
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    return np.argsort(lengths, kind="stable")
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -9,17 +9,51 @@ class Settings(BaseSettings):
     qdrant_url: str = "https://your-cluster.qdrant.tech"
     qdrant_api_key: str = "your-qdrant-api-key"
     
+    qdrant_upload_batch_size: int = 256  # Points per request when uploading a chunk matrix
+    
     # Google OAuth Configuration (Centralized)
     google_client_id: str = "your-google-client-id"
     google_client_secret: str = "your-google-client-secret"
     google_redirect_uri: str = "https://docingest.industrialwebworks.net/oauth/callback"
     
+    # Shared HTTP client for Google Drive and OAuth calls
+    http_http2: bool = True  # Negotiate HTTP/2 (needs the h2 package; falls back to HTTP/1.1)
+    http_max_connections: int = 20  # Open connections across all hosts
+    http_max_keepalive_connections: int = 10  # Idle connections kept for reuse
+    http_keepalive_expiry_seconds: float = 60  # Close idle connections after this long
+    http_connect_timeout_seconds: float = 10
+    http_read_timeout_seconds: float = 120  # Also bounds write time and gaps between download chunks
+    http_pool_timeout_seconds: float = 30  # Wait for a free connection when the pool is full
+    http_connect_retries: int = 1  # Retries for failed connection attempts only
+    drive_page_size: int = 1000  # Items per files.list page (Drive maximum)
+    drive_crawl_concurrency: int = 4  # Folders listed at once while crawling
+    drive_list_retries: int = 3  # Retries per listing page on 429/5xx (exponential backoff)
+    
     # Unstructured API Configuration
     unstructured_api_key: str = "your-unstructured-api-key"
     
     # FastEmbed Configuration
     embedding_model: str = "BAAI/bge-small-en-v1.5"  # FastEmbed default
-    embedding_dimension: int = 384
+    embedding_quantized: bool = False  # Load the int8 ONNX variant of embedding_model
+    embedding_threads: Optional[int] = None  # ONNX intra-op threads of the in-process session (None lets onnxruntime decide)
+    embedding_dimension: int = 384  # Fallback only; the loaded model's dimension wins
+    query_batching_enabled: bool = True
+    query_batch_window_ms: float = 3.0  # How long to collect concurrent queries
+    query_batch_max_size: int = 32  # Flush early once this many queries are waiting
+    embedding_workers: int = 2  # Threads running model inference off the event loop
+    embedding_queue_depth: int = 64  # Max submitted inference tasks before callers wait
+    embedding_batch_size: int = 256  # Texts per ONNX run inside model.embed
+    embedding_length_bucketing: bool = True  # Sort texts by length before batching to cut padding
+    embedding_parallel_workers: int = 0  # Ingest-side embedding processes (0 disables)
+    embedding_parallel_batch_size: int = 256  # Texts per shard sent to a worker process
+    embedding_parallel_min_texts: int = 256  # Only shard calls at least this large (capped at ingest_chunk_window)
+    embedding_parallel_threads: int = 1  # ONNX threads per worker process (on top of embedding_threads)
+    query_cache_enabled: bool = True
+    query_cache_size: int = 10000  # Max cached query embeddings
+    query_cache_ttl_seconds: int = 3600
+    embedding_cache_enabled: bool = True  # Persistent chunk embedding cache for re-ingest
+    embedding_cache_path: str = "embedding_cache.db"
+    embedding_cache_max_entries: int = 1000000  # ~1.6 GB at 384 float32 dimensions
     
     # Security Configuration
     api_secret_key: str = "your-shared-secret-with-proxy"
@@ -44,7 +78,29 @@ class Settings(BaseSettings):
     # Processing Configuration
     chunk_size: int = 1000
     chunk_overlap: int = 200
-    max_file_size: int = 50 * 1024 * 1024  # 50MB
+    max_file_size: int = 50 * 1024 * 1024  # 50MB, enforced while downloading
+    download_spool_max_bytes: int = 8 * 1024 * 1024  # Larger downloads stream to a temp file
+    download_chunk_bytes: int = 256 * 1024  # Read size while streaming downloads
+    parser_workers: int = 2  # Parsing processes (0 parses in a thread instead)
+    parser_timeout_seconds: float = 300  # Kill and restart a worker stuck on one file (0 disables)
+    parser_inline_max_bytes: int = 8 * 1024 * 1024  # Larger inputs/results go via temp files
+    docx_engine: str = "native"  # "native" (streams the DOCX zip) or "unstructured" (partition_docx)
+    parser_prewarm: bool = False  # Start parser workers at startup with every engine imported
+    parser_page_window: int = 32  # Pages parsed per task and held in memory at a time
+    ingest_chunk_window: int = 512  # Chunks embedded and upserted per step during ingest
+    ingest_file_concurrency: int = 5  # Files downloaded and processed at once per job
+    manifest_path: str = "ingest_manifest.db"  # Per-tenant record of ingested files for incremental re-ingest
+    ocr_workers: int = 0  # Pages OCR'd concurrently per parser process (0 = cores / parser_workers)
+    ocr_threads_per_page: int = 1  # OMP_THREAD_LIMIT for each Tesseract process
+    ocr_page_timeout_seconds: float = 60  # Give up on a single page after this long (0 disables)
+    ocr_prewarm_easyocr: bool = False  # Load the EasyOCR fallback when each parser worker starts
+    ocr_target_dpi: int = 200  # Render resolution for regular page formats
+    ocr_min_dpi: int = 120  # Large formats (A3 and up) where print is large
+    ocr_max_dpi: int = 300  # Small formats (A5 and down) where print is small
+    ocr_max_pixels: int = 25000000  # Render budget per page; huge pages get a lower DPI
+    ocr_cache_enabled: bool = True  # Persistent OCR results keyed by page raster hash
+    ocr_cache_path: str = "ocr_cache.db"
+    ocr_cache_max_entries: int = 200000
     supported_mime_types: List[str] = [
         "application/pdf",
         "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
@@ -0,0 +1,78 @@
+"""
+Lazy imports for heavy parsing/OCR engines
+Each engine is imported on first use and its import time is recorded for the startup report
+"""
+
+import importlib
+import os
+import threading
+import time
+from types import ModuleType
+from typing import Dict
+
+from app.utils.logging_optimized import get_logger
+
+logger = get_logger(__name__)
+
+# Tesseract install used by the service (configured when pytesseract is first loaded)
+TESSERACT_CMD = "/var/www/vhosts/old.industrialwebworks.net/mamba/envs/docingest/bin/tesseract"
+TESSDATA_PREFIX = "/var/www/vhosts/old.industrialwebworks.net/mamba/envs/docingest/share/tessdata"
+
+_modules: Dict[str, ModuleType] = {}
+_import_seconds: Dict[str, float] = {}
+_lock = threading.Lock()
+
+def lazy_import(module_name: str) -> ModuleType:
+    """Import a module on first use and record how long the import took"""
+    module = _modules.get(module_name)
+    if module is not None:
+        return module
+
+    with _lock:
+        if module_name not in _modules:
+            start_time = time.perf_counter()
+            module = importlib.import_module(module_name)
+            _import_seconds[module_name] = time.perf_counter() - start_time
+            _modules[module_name] = module
+            logger.info(f"Imported {module_name} in {_import_seconds[module_name]:.2f}s")
+        return _modules[module_name]
+
+def load_fitz() -> ModuleType:
+    """PyMuPDF"""
+    return lazy_import("fitz")
+
+def load_pytesseract() -> ModuleType:
+    """pytesseract, pointed at the service's Tesseract install"""
+    first_load = "pytesseract" not in _modules
+    pytesseract = lazy_import("pytesseract")
+    if first_load:
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+        os.environ.setdefault("TESSDATA_PREFIX", TESSDATA_PREFIX)
+    return pytesseract
+
+def load_easyocr() -> ModuleType:
+    """EasyOCR (pulls in torch)"""
+    return lazy_import("easyocr")
+
+def load_pil_image() -> ModuleType:
+    """PIL.Image"""
+    return lazy_import("PIL.Image")
+
+def load_partition_docx():
+    """unstructured's DOCX partitioner"""
+    return lazy_import("unstructured.partition.docx").partition_docx
+
+# Engines each parser format needs, for pre-warming worker processes
+PREWARM_LOADERS = [load_fitz, load_pytesseract, load_pil_image, load_partition_docx]
+
+def prewarm(include_easyocr: bool = False):
+    """Import every parsing engine up front"""
+    for loader in PREWARM_LOADERS + ([load_easyocr] if include_easyocr else []):
+        try:
+            loader()
+        except Exception as e:
+            logger.error(f"Failed to pre-warm {loader.__name__}: {e}")
+
+def get_import_report() -> Dict[str, float]:
+    """Seconds spent importing each lazily loaded engine in this process"""
+    return {name: round(seconds, 3) for name, seconds in _import_seconds.items()}
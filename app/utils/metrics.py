@@ -0,0 +1,88 @@
+"""
+Lightweight in-process metrics used by the admin stats endpoints
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._min: Optional[float] = None
+        self._max: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record a single observation"""
+        with self._lock:
+            index = len(self.buckets)
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    index = i
+                    break
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            self._min = value if self._min is None else min(self._min, value)
+            self._max = value if self._max is None else max(self._max, value)
+
+    def snapshot(self) -> Dict:
+        """Get a JSON-serialisable view of the histogram"""
+        with self._lock:
+            buckets = {f"le_{upper:g}": count for upper, count in zip(self.buckets, self._counts)}
+            buckets["le_inf"] = self._counts[-1]
+            return {
+                "count": self._count,
+                "sum": round(self._sum, 6),
+                "mean": round(self._sum / self._count, 6) if self._count else 0.0,
+                "min": self._min,
+                "max": self._max,
+                "buckets": buckets
+            }
+
+    def reset(self):
+        """Clear all observations"""
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._min = None
+            self._max = None
+
+class StageTimer:
+    """Wall-clock seconds accumulated per named stage (extract, render, ocr, chunk, embed, upsert, ...)"""
+
+    def __init__(self, seconds: Optional[Dict[str, float]] = None):
+        self._seconds: Dict[str, float] = dict(seconds or {})
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block of work under a stage"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start_time)
+
+    def add(self, name: str, seconds: float):
+        """Add seconds to a stage"""
+        with self._lock:
+            self._seconds[name] = self._seconds.get(name, 0.0) + seconds
+
+    def merge(self, seconds: Dict[str, float]):
+        """Add every stage of another set of timings"""
+        for name, value in seconds.items():
+            self.add(name, value)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Get the stage timings, rounded for reporting"""
+        with self._lock:
+            return {name: round(value, 6) for name, value in self._seconds.items()}
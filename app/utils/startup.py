@@ -0,0 +1,57 @@
+"""
+Startup report - how long the service took to become ready and where the time went
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+import psutil
+
+from app.utils.lazy_imports import get_import_report
+from app.utils.logging_optimized import get_logger
+
+logger = get_logger(__name__)
+
+_phases: Dict[str, float] = {}
+_ready: Dict = {}
+
+def process_age_seconds() -> float:
+    """Seconds since this process was created"""
+    return time.time() - psutil.Process().create_time()
+
+def record_phase(name: str, seconds: float):
+    """Record the duration of a startup phase"""
+    _phases[name] = round(seconds, 3)
+
+@contextmanager
+def startup_phase(name: str):
+    """Time a block of startup work"""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start_time)
+
+def mark_ready():
+    """Record that the service is ready to take requests and log the report"""
+    _ready.update({
+        "ready_at": time.time(),
+        "process_start_to_ready_seconds": round(process_age_seconds(), 3),
+        "rss_bytes_at_ready": psutil.Process().memory_info().rss
+    })
+    phases = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in _phases.items())
+    logger.info(
+        f"Service ready {_ready['process_start_to_ready_seconds']:.2f}s after process start "
+        f"({phases}; RSS {_ready['rss_bytes_at_ready'] / (1024 * 1024):.0f} MB)"
+    )
+
+def get_startup_report() -> Dict:
+    """Get startup phase timings and the engines imported lazily since"""
+    return {
+        "ready": "ready_at" in _ready,
+        "process_start_to_ready_seconds": _ready.get("process_start_to_ready_seconds"),
+        "rss_bytes_at_ready": _ready.get("rss_bytes_at_ready"),
+        "phases": dict(_phases),
+        "lazy_imports": get_import_report()
+    }
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+DOCX engine benchmark
+Compares the native zip-streaming DOCX engine with unstructured's partition_docx
+on generated documents (paragraphs, tables, page breaks) and any fixture .docx files
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import zipfile
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.parser_service_optimized import ParserService
+from benchmarks.corpus import make_text
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+def make_docx(pages: int, paragraphs_per_page: int = 8, seed: int = 42) -> bytes:
+    """Build a DOCX with paragraphs, a table per page and explicit page breaks"""
+    rng = random.Random(seed)
+    body: List[str] = []
+    for page in range(pages):
+        for _ in range(paragraphs_per_page):
+            text = escape(make_text(rng.randint(150, 400), rng))
+            body.append(f'<w:p><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>')
+        rows = []
+        for row in range(4):
+            cells = "".join(
+                f'<w:tc><w:p><w:r><w:t>{escape(make_text(20, rng))}</w:t></w:r></w:p></w:tc>' for _ in range(3)
+            )
+            rows.append(f"<w:tr>{cells}</w:tr>")
+        body.append(f'<w:tbl>{"".join(rows)}</w:tbl>')
+        if page < pages - 1:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(body)}<w:sectPr/></w:body></w:document>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", ROOT_RELS)
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+def load_documents(page_counts: List[int], fixture_dir: str) -> Dict[str, bytes]:
+    """Generated documents plus any .docx fixtures"""
+    documents = {f"generated-{pages}p.docx": make_docx(pages) for pages in page_counts}
+    if fixture_dir and os.path.isdir(fixture_dir):
+        for name in sorted(os.listdir(fixture_dir)):
+            if name.lower().endswith(".docx"):
+                with open(os.path.join(fixture_dir, name), "rb") as f:
+                    documents[name] = f.read()
+    return documents
+
+def bench_engine(engine: str, documents: Dict[str, bytes], repeats: int) -> Dict[str, Dict]:
+    """Parse every document with one engine, keeping the best of `repeats` runs"""
+    parser_service = ParserService()
+    parser_service.settings.docx_engine = engine
+
+    # First call pays the engine's import; report it separately
+    start_time = time.perf_counter()
+    parser_service.parse_document(next(iter(documents.values())), DOCX_MIME, "warmup.docx")
+    first_call = time.perf_counter() - start_time
+
+    results = {"_first_call_seconds": {"seconds": round(first_call, 3)}}
+    for name, content in documents.items():
+        runs = []
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            parsed_doc = parser_service.parse_document(content, DOCX_MIME, name)
+            runs.append(time.perf_counter() - start_time)
+        results[name] = {
+            "seconds": round(min(runs), 4),
+            "pages": parsed_doc.total_pages,
+            "chars": sum(len(page.text) for page in parsed_doc.pages)
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Native vs unstructured DOCX parsing benchmark")
+    parser.add_argument("--pages", default="10,100,500", help="Comma-separated generated document sizes")
+    parser.add_argument("--fixture-dir", default=FIXTURE_DIR)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    documents = load_documents([int(x) for x in args.pages.split(",")], args.fixture_dir)
+    print(f"Benchmarking {len(documents)} DOCX documents")
+
+    results = {}
+    for engine in ["native", "unstructured"]:
+        try:
+            results[engine] = bench_engine(engine, documents, args.repeats)
+        except Exception as e:
+            print(f"  {engine}: skipped ({e})")
+
+    for engine, engine_results in results.items():
+        print(f"\n{engine} (first call incl. imports: {engine_results['_first_call_seconds']['seconds']:.2f}s)")
+        for name, result in engine_results.items():
+            if name.startswith("_"):
+                continue
+            print(f"  {name:<28} {result['seconds'] * 1000:>9.1f} ms  pages={result['pages']:<5} chars={result['chars']}")
+
+    if len(results) == 2:
+        print("\nSpeedup (unstructured / native):")
+        for name in documents:
+            native = results["native"][name]["seconds"]
+            baseline = results["unstructured"][name]["seconds"]
+            print(f"  {name:<28} {baseline / native if native else 0:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
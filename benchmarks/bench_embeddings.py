@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Offline embedding throughput and latency benchmark suite
+Measures EmbeddingService without Google Drive or Qdrant:
+  - generate_embeddings chunks/sec across batch sizes and ONNX thread counts
+  - generate_query_embedding p50/p95/p99 latency under concurrency
+Results are written as JSON so runs can be compared between releases.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.embedding_service_optimized import EmbeddingService
+from app.services.model_registry import get_model_registry
+from app.services.query_batcher import close_query_batchers
+from app.utils.config import get_settings
+from benchmarks.corpus import mixed_corpus, make_text
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+MIME_TYPES = {
+    ".txt": "text/plain",
+    ".csv": "text/csv",
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+}
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(int(round(pct / 100.0 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+def load_fixture_corpus(fixture_dir: str) -> List[str]:
+    """Parse and chunk every supported fixture file with the real parser"""
+    from app.services.parser_service_optimized import ParserService
+
+    parser_service = ParserService()
+    texts = []
+    for name in sorted(os.listdir(fixture_dir)):
+        mime_type = MIME_TYPES.get(os.path.splitext(name)[1].lower())
+        if not mime_type:
+            continue
+        with open(os.path.join(fixture_dir, name), "rb") as f:
+            parsed_doc = parser_service.parse_document(f.read(), mime_type, name)
+        texts.extend(chunk["text"] for chunk in parser_service.chunk_document(parsed_doc))
+    return texts
+
+def new_service(threads: int) -> EmbeddingService:
+    """Fresh service whose model runs with the given ONNX thread count"""
+    registry = get_model_registry()
+    registry.clear()
+    registry.settings.embedding_threads = threads or None
+    service = EmbeddingService()
+    # Measure inference only: no persistent cache, no worker processes
+    service.settings.embedding_cache_enabled = False
+    service.settings.embedding_parallel_workers = 0
+    return service
+
+async def bench_throughput(corpora: Dict[str, List[str]], batch_sizes: List[int],
+                           thread_counts: List[int], repeats: int) -> List[Dict]:
+    """chunks/sec for generate_embeddings per corpus, batch size and thread count"""
+    results = []
+    for threads in thread_counts:
+        service = new_service(threads)
+        for batch_size in batch_sizes:
+            service.settings.embedding_batch_size = batch_size
+            for corpus_name, texts in corpora.items():
+                await service.generate_embeddings(texts[:batch_size])  # warm-up
+                runs = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    await service.generate_embeddings(texts)
+                    runs.append(len(texts) / (time.perf_counter() - start))
+                result = {
+                    "corpus": corpus_name,
+                    "chunks": len(texts),
+                    "threads": threads,
+                    "batch_size": batch_size,
+                    "chunks_per_sec": round(max(runs), 2),
+                    "chunks_per_sec_median": round(statistics.median(runs), 2)
+                }
+                results.append(result)
+                print(f"  throughput corpus={corpus_name:<9} threads={threads:<2} batch={batch_size:<4} "
+                      f"{result['chunks_per_sec']:>9.1f} chunks/s")
+    return results
+
+async def bench_query_latency(concurrency_levels: List[int], queries_per_client: int) -> List[Dict]:
+    """p50/p95/p99 latency of generate_query_embedding with N concurrent clients"""
+    results = []
+    service = new_service(0)
+    # Unique queries so every call reaches the model
+    service.settings.query_cache_enabled = False
+
+    for concurrency in concurrency_levels:
+        latencies: List[float] = []
+
+        async def client(client_id: int):
+            for i in range(queries_per_client):
+                query = f"{make_text(60, random.Random(client_id * 100003 + i))} {concurrency}-{client_id}-{i}"
+                start = time.perf_counter()
+                await service.generate_query_embedding(query)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client(c) for c in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+        result = {
+            "concurrency": concurrency,
+            "queries": len(latencies),
+            "queries_per_sec": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3)
+        }
+        results.append(result)
+        print(f"  query latency concurrency={concurrency:<3} p50={result['p50_ms']:.1f}ms "
+              f"p95={result['p95_ms']:.1f}ms p99={result['p99_ms']:.1f}ms ({result['queries_per_sec']:.0f} q/s)")
+
+    await close_query_batchers()
+    return results
+
+def git_revision() -> str:
+    """Current git commit, if available"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+def compare(previous_path: str, current: Dict):
+    """Print relative change against a previous results file"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+
+    print(f"\nComparison with {previous_path} (version {previous['meta'].get('app_version')}, "
+          f"revision {previous['meta'].get('git_revision')}):")
+    old_rates = {(r["corpus"], r["threads"], r["batch_size"]): r["chunks_per_sec"] for r in previous["throughput"]}
+    for r in current["throughput"]:
+        old = old_rates.get((r["corpus"], r["threads"], r["batch_size"]))
+        if old:
+            print(f"  throughput {r['corpus']:<9} threads={r['threads']:<2} batch={r['batch_size']:<4} "
+                  f"{(r['chunks_per_sec'] / old - 1) * 100:+6.1f}%")
+    old_latency = {r["concurrency"]: r for r in previous["query_latency"]}
+    for r in current["query_latency"]:
+        old = old_latency.get(r["concurrency"])
+        if old and old["p99_ms"]:
+            print(f"  query p99 concurrency={r['concurrency']:<3} {(r['p99_ms'] / old['p99_ms'] - 1) * 100:+6.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline embedding benchmark suite")
+    parser.add_argument("--chunks", type=int, default=2000, help="Synthetic corpus size")
+    parser.add_argument("--fixture-dir", default=FIXTURE_DIR, help="Directory of fixture documents")
+    parser.add_argument("--batch-sizes", default="16,64,256", help="Comma-separated ONNX batch sizes")
+    parser.add_argument("--threads", default="1,2,4", help="Comma-separated ONNX thread counts (0 = auto)")
+    parser.add_argument("--concurrency", default="1,10,50", help="Comma-separated concurrent query clients")
+    parser.add_argument("--queries-per-client", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    corpora = {"synthetic": mixed_corpus(args.chunks, settings.chunk_size)}
+    if args.fixture_dir and os.path.isdir(args.fixture_dir):
+        fixture_texts = load_fixture_corpus(args.fixture_dir)
+        if fixture_texts:
+            corpora["fixture"] = fixture_texts
+
+    print(f"Benchmarking {settings.embedding_model} on {', '.join(f'{k}={len(v)}' for k, v in corpora.items())} chunks")
+
+    async def run_all():
+        throughput = await bench_throughput(
+            corpora,
+            [int(x) for x in args.batch_sizes.split(",")],
+            [int(x) for x in args.threads.split(",")],
+            args.repeats
+        )
+        latency = await bench_query_latency(
+            [int(x) for x in args.concurrency.split(",")],
+            args.queries_per_client
+        )
+        return throughput, latency
+
+    throughput, latency = asyncio.run(run_all())
+
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "app_version": settings.app_version,
+            "git_revision": git_revision(),
+            "model": settings.embedding_model,
+            "quantized": settings.embedding_quantized,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "throughput": throughput,
+        "query_latency": latency
+    }
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results",
+        f"embeddings-{settings.app_version}-{results['meta']['git_revision']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Synthetic corpora for offline embedding benchmarks
+Shaped like ParserService.chunk_document output: mostly full-size chunks,
+plus page tails and short title/caption pages
+"""
+
+import random
+from typing import List
+
+VOCABULARY = (
+    "coating carbide thermal spray warranty substrate hardness abrasion "
+    "corrosion chrome plating replacement application bulletin pressure "
+    "temperature specification tolerance inspection certificate process "
+    "oil gas pump valve seal screw barrel rebuild surface finish micron "
+    "the of and to in for with on by is are be this that from as at or"
+).split()
+
+def make_text(length: int, rng: random.Random) -> str:
+    """Build text of roughly `length` characters from the vocabulary"""
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+def mixed_corpus(count: int, chunk_size: int = 1000, seed: int = 42) -> List[str]:
+    """Mixed-length corpus: 60% full chunks, 25% page tails, 15% short pages"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.60:
+            length = chunk_size
+        elif roll < 0.85:
+            length = rng.randint(50, chunk_size - 1)
+        else:
+            length = rng.randint(10, 200)
+        texts.append(make_text(length, rng))
+    return texts
@@ -0,0 +1,41 @@
+"""
+Shared test setup
+app.utils.logging_optimized and app.utils.security are deployment modules kept out of
+the repository; when they cannot be imported, minimal stand-ins are installed so the
+modules under test import without them
+"""
+
+import importlib
+import logging
+import sys
+import types
+from typing import List
+
+def _is_missing(name: str) -> bool:
+    """Whether a module itself is absent (not just one of its dependencies)"""
+    try:
+        importlib.import_module(name)
+    except ModuleNotFoundError as e:
+        return e.name == name
+    return False
+
+def _chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """Fixed-size character windows with overlap"""
+    step = max(chunk_size - overlap, 1)
+    return [text[i:i + chunk_size] for i in range(0, len(text), step)] if text else []
+
+if _is_missing("app.utils.logging_optimized"):
+    logging_module = types.ModuleType("app.utils.logging_optimized")
+    logging_module.get_logger = logging.getLogger
+    logging_module.setup_logging = lambda *args, **kwargs: None
+    logging_module.log_error = lambda error, message: logging.getLogger("app").error(f"{message}: {error}")
+    logging_module.log_ingest_progress = lambda *args, **kwargs: None
+    sys.modules["app.utils.logging_optimized"] = logging_module
+
+if _is_missing("app.utils.security"):
+    security_module = types.ModuleType("app.utils.security")
+    security_module.chunk_text = _chunk_text
+    security_module.get_collection_name = lambda tenant: f"tenant_{tenant}"
+    security_module.generate_job_id = lambda: "job"
+    security_module.validate_tenant_name = lambda tenant: True
+    sys.modules["app.utils.security"] = security_module
@@ -0,0 +1,68 @@
+"""
+Tests for length-sorted embedding batches
+"""
+
+import numpy as np
+import pytest
+
+from app.utils.batching import length_sorted_order
+
+def test_order_sorts_by_length():
+    texts = ["ccc", "a", "bb", "dddd", ""]
+
+    order = length_sorted_order(texts)
+
+    assert [len(texts[i]) for i in order] == [0, 1, 2, 3, 4]
+
+def test_order_is_stable_for_equal_lengths():
+    texts = ["b2", "a1", "c", "d4", "e5"]
+
+    assert list(length_sorted_order(texts)) == [2, 0, 1, 3, 4]
+
+def test_order_is_a_permutation():
+    texts = ["a" * n for n in [5, 3, 5, 0, 9, 3]]
+
+    assert sorted(length_sorted_order(texts)) == list(range(len(texts)))
+
+def test_empty_input():
+    assert len(length_sorted_order([])) == 0
+
+class FakeModel:
+    """Embeds each text as (length, checksum) and records the order texts arrive in"""
+
+    def __init__(self):
+        self.seen = []
+
+    def embed(self, texts, batch_size=256):
+        for text in texts:
+            self.seen.append(text)
+            yield np.array([len(text), sum(map(ord, text))], dtype=np.float32)
+
+class FakeRegistry:
+    def __init__(self, model):
+        self.model = model
+
+    def get_model(self, model_name):
+        return self.model
+
+@pytest.mark.parametrize("bucketing", [True, False])
+def test_embed_matrix_rows_follow_input_order(monkeypatch, bucketing):
+    embedding_service = pytest.importorskip("app.services.embedding_service_optimized")
+    model = FakeModel()
+    monkeypatch.setattr(embedding_service, "get_model_registry", lambda: FakeRegistry(model))
+    monkeypatch.setenv("EMBEDDING_LENGTH_BUCKETING", str(bucketing).lower())
+    monkeypatch.setenv("EMBEDDING_BATCH_SIZE", "8")
+    service = embedding_service.EmbeddingService()
+
+    rng = np.random.default_rng(7)
+    texts = ["".join(rng.choice(list("abcdefgh"), size=int(n))) for n in rng.integers(0, 200, size=101)]
+    matrix = service._embed_matrix_sync(texts)
+
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (len(texts), 2)
+    for row, text in zip(matrix, texts):
+        assert list(row) == [len(text), sum(map(ord, text))]
+    if bucketing:
+        assert [len(text) for text in model.seen] == sorted(len(text) for text in texts)
+    else:
+        assert model.seen == texts
@@ -0,0 +1,86 @@
+"""
+Tests for the in-process LRU/TTL cache
+"""
+
+from app.utils import cache as cache_module
+from app.utils.cache import LRUCache
+
+class FakeClock:
+    """Monotonic clock the tests advance by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_get_returns_stored_value_and_counts_hits_and_misses():
+    cache = LRUCache(max_size=4)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_evicts_least_recently_used_entry_over_the_cap():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get_stats()["size"] == 2
+
+def test_setting_an_existing_key_refreshes_it_without_evicting():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    cache.set("c", 3)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+    assert cache.get_stats()["evictions"] == 1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = LRUCache(max_size=4, ttl_seconds=10)
+    cache.set("a", 1)
+
+    clock.now += 9.9
+    assert cache.get("a") == 1
+
+    clock.now += 0.1
+    assert cache.get("a") is None
+    stats = cache.get_stats()
+    assert stats["expirations"] == 1
+    assert stats["size"] == 0
+
+def test_zero_ttl_never_expires(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = LRUCache(max_size=4, ttl_seconds=0)
+    cache.set("a", 1)
+
+    clock.now += 10 ** 9
+    assert cache.get("a") == 1
+
+def test_clear_drops_entries_but_keeps_counters():
+    cache = LRUCache(max_size=4)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.clear()
+
+    assert cache.get("a") is None
+    stats = cache.get_stats()
+    assert stats["size"] == 0
+    assert stats["hits"] == 1
@@ -0,0 +1,98 @@
+"""
+Tests for CSV paging: whole rows per page, each page starting with the header row
+"""
+
+import csv
+import io
+
+import pytest
+
+parser_service = pytest.importorskip("app.services.parser_service_optimized")
+
+CHUNK_SIZE = 120
+
+@pytest.fixture
+def parser(monkeypatch):
+    monkeypatch.setenv("CHUNK_SIZE", str(CHUNK_SIZE))
+    monkeypatch.setenv("CHUNK_OVERLAP", "20")
+    monkeypatch.setenv("OCR_CACHE_ENABLED", "false")
+    return parser_service.ParserService()
+
+def csv_pages(parser, content: bytes):
+    return list(parser.iter_pages(content, "text/csv", "table.csv"))
+
+def rows_of(page_text: str):
+    return list(csv.reader(io.StringIO(page_text)))
+
+def test_every_page_starts_with_the_header(parser):
+    lines = ["id,name,qty"] + [f"{i},part number {i},{i * 10}" for i in range(40)]
+    pages = csv_pages(parser, "\n".join(lines).encode())
+
+    assert len(pages) > 1
+    assert [page.page_number for page in pages] == list(range(1, len(pages) + 1))
+    data_rows = []
+    for page in pages:
+        rows = rows_of(page.text)
+        assert rows[0] == ["id", "name", "qty"]
+        assert len(page.text) <= CHUNK_SIZE
+        data_rows.extend(rows[1:])
+    assert data_rows == [[str(i), f"part number {i}", str(i * 10)] for i in range(40)]
+
+def test_quoted_multi_line_rows_stay_whole(parser):
+    content = (
+        'id,notes\n'
+        '1,"first line\nsecond line"\n'
+        '2,"has, a comma and ""quotes"""\n'
+        '3,plain\n'
+    ).encode()
+
+    pages = csv_pages(parser, content)
+
+    assert len(pages) == 1
+    assert rows_of(pages[0].text) == [
+        ["id", "notes"],
+        ["1", "first line\nsecond line"],
+        ["2", 'has, a comma and "quotes"'],
+        ["3", "plain"],
+    ]
+
+def test_blank_rows_are_skipped(parser):
+    pages = csv_pages(parser, b"a,b\n1,2\n,\n\n3,4\n")
+
+    assert rows_of(pages[0].text) == [["a", "b"], ["1", "2"], ["3", "4"]]
+
+def test_header_only_file_is_one_page(parser):
+    pages = csv_pages(parser, b"a,b\n")
+
+    assert len(pages) == 1
+    assert pages[0].text == "a,b"
+
+def test_empty_file_has_no_pages(parser):
+    assert csv_pages(parser, b"") == []
+
+def test_utf8_bom_is_not_part_of_the_header(parser):
+    pages = csv_pages(parser, "﻿a,b\n1,2\n".encode("utf-8"))
+
+    assert rows_of(pages[0].text)[0] == ["a", "b"]
+
+def test_csv_pages_are_one_chunk_each(parser):
+    lines = ["id,name"] + [f"{i},name {i}" for i in range(30)]
+    pages = csv_pages(parser, "\n".join(lines).encode())
+
+    chunks = list(parser.chunk_pages(pages, "doc", "table.csv", "text/csv"))
+
+    assert [chunk["text"] for chunk in chunks] == [page.text for page in pages]
+
+def test_row_longer_than_a_chunk_is_split(parser):
+    pages = csv_pages(parser, ("id,text\n1," + "x" * (CHUNK_SIZE * 3) + "\n").encode())
+
+    chunks = list(parser.chunk_pages(pages, "doc", "table.csv", "text/csv"))
+
+    assert len(pages) == 1
+    assert len(chunks) > 1
+    assert all(len(chunk["text"]) <= CHUNK_SIZE for chunk in chunks)
+
+def test_semicolon_delimiter_is_detected(parser):
+    pages = csv_pages(parser, b"a;b\n1;2\n3;4\n")
+
+    assert list(csv.reader(io.StringIO(pages[0].text), delimiter=";")) == [["a", "b"], ["1", "2"], ["3", "4"]]
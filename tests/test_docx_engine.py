@@ -0,0 +1,113 @@
+"""
+Tests for the native streaming DOCX engine
+"""
+
+import io
+import zipfile
+
+import pytest
+
+from app.services.docx_engine import PAGE_BREAK, has_page_markers, iter_docx_blocks
+
+NAMESPACE = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+def make_docx(body: str) -> bytes:
+    """A DOCX package holding only word/document.xml with the given body markup"""
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document {NAMESPACE}><w:body>{body}<w:sectPr/></w:body></w:document>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+def paragraph(*runs: str, properties: str = "") -> str:
+    """A paragraph with one run per string (raw run content markup)"""
+    return f"<w:p>{properties}{''.join(f'<w:r>{run}</w:r>' for run in runs)}</w:p>"
+
+def text(value: str) -> str:
+    return f'<w:t xml:space="preserve">{value}</w:t>'
+
+def cell(*contents: str) -> str:
+    return f"<w:tc>{''.join(contents)}</w:tc>"
+
+def test_paragraphs_in_document_order():
+    docx = make_docx(paragraph(text("First")) + paragraph(text("Second"), text(" part")))
+
+    assert list(iter_docx_blocks(docx)) == ["First", "Second part"]
+
+def test_empty_paragraphs_are_skipped():
+    docx = make_docx(paragraph(text("   ")) + paragraph() + paragraph(text("Kept")))
+
+    assert list(iter_docx_blocks(docx)) == ["Kept"]
+
+def test_tabs_and_line_breaks_inside_a_paragraph():
+    docx = make_docx(paragraph(text("a"), "<w:tab/>", text("b"), "<w:br/>", text("c")))
+
+    assert list(iter_docx_blocks(docx)) == ["a\tb\nc"]
+
+def test_explicit_page_break_splits_a_paragraph():
+    docx = make_docx(paragraph(text("Page one"), '<w:br w:type="page"/>', text("Page two")))
+
+    assert list(iter_docx_blocks(docx)) == ["Page one", PAGE_BREAK, "Page two"]
+
+def test_page_break_before_and_rendered_page_breaks():
+    docx = make_docx(
+        paragraph(text("One"))
+        + paragraph(text("Two"), properties="<w:pPr><w:pageBreakBefore/></w:pPr>")
+        + paragraph(text("Three "), "<w:lastRenderedPageBreak/>", text("Four"))
+    )
+
+    assert list(iter_docx_blocks(docx)) == ["One", PAGE_BREAK, "Two", "Three", PAGE_BREAK, "Four"]
+
+def test_page_break_before_switched_off_is_ignored():
+    docx = make_docx(paragraph(text("Two"), properties='<w:pPr><w:pageBreakBefore w:val="0"/></w:pPr>'))
+
+    assert list(iter_docx_blocks(docx)) == ["Two"]
+
+@pytest.mark.parametrize("section_type, breaks", [("nextPage", True), ("continuous", False)])
+def test_section_breaks_start_a_page_unless_continuous(section_type, breaks):
+    section = f'<w:pPr><w:sectPr><w:type w:val="{section_type}"/></w:sectPr></w:pPr>'
+    docx = make_docx(paragraph(text("Section one"), properties=section) + paragraph(text("Section two")))
+
+    expected = ["Section one", PAGE_BREAK, "Section two"] if breaks else ["Section one", "Section two"]
+    assert list(iter_docx_blocks(docx)) == expected
+
+def test_table_rows_are_joined_cells():
+    table = (
+        "<w:tbl>"
+        f"<w:tr>{cell(paragraph(text('Part')))}{cell(paragraph(text('Qty')))}</w:tr>"
+        f"<w:tr>{cell(paragraph(text('Bolt')), paragraph(text('M8')))}{cell(paragraph(text('4')))}</w:tr>"
+        f"<w:tr>{cell(paragraph())}{cell(paragraph(text('only')))}</w:tr>"
+        f"<w:tr>{cell(paragraph())}</w:tr>"
+        "</w:tbl>"
+    )
+    docx = make_docx(paragraph(text("Before")) + table + paragraph(text("After")))
+
+    assert list(iter_docx_blocks(docx)) == ["Before", "Part | Qty", "Bolt M8 | 4", "only", "After"]
+
+def test_page_breaks_inside_tables_are_ignored():
+    row = cell(paragraph(text("a"), '<w:br w:type="page"/>', text("b")))
+    table = f"<w:tbl><w:tr>{row}</w:tr></w:tbl>"
+
+    assert list(iter_docx_blocks(make_docx(table))) == ["a b"]
+
+def test_nested_table_rows_belong_to_the_enclosing_cell():
+    inner = f"<w:tbl><w:tr>{cell(paragraph(text('x')))}{cell(paragraph(text('y')))}</w:tr></w:tbl>"
+    table = f"<w:tbl><w:tr>{cell(paragraph(text('outer')), inner)}{cell(paragraph(text('z')))}</w:tr></w:tbl>"
+
+    assert list(iter_docx_blocks(make_docx(table))) == ["outer x | y | z"]
+
+def test_docx_given_as_a_file_path(tmp_path):
+    path = tmp_path / "document.docx"
+    path.write_bytes(make_docx(paragraph(text("From disk"))))
+
+    assert list(iter_docx_blocks(str(path))) == ["From disk"]
+
+def test_has_page_markers():
+    assert not has_page_markers(make_docx(paragraph(text("No breaks"))))
+    assert has_page_markers(make_docx(paragraph(text("a"), '<w:br w:type="page"/>')))
+    assert has_page_markers(make_docx(paragraph(text("a"), "<w:lastRenderedPageBreak/>")))
+    section = "<w:pPr><w:sectPr/></w:pPr>"
+    assert has_page_markers(make_docx(paragraph(text("a"), properties=section)))
@@ -0,0 +1,78 @@
+"""
+Tests for the persistent chunk embedding cache
+"""
+
+import numpy as np
+import pytest
+
+embedding_cache = pytest.importorskip("app.services.embedding_cache")
+
+@pytest.fixture
+def cache(tmp_path):
+    return embedding_cache.EmbeddingCache(db_path=str(tmp_path / "embeddings.db"), max_entries=100)
+
+def vectors(*values):
+    """One 4-dimensional float32 vector per value"""
+    return np.array([[value] * 4 for value in values], dtype=np.float32)
+
+def test_get_many_returns_hits_by_position(cache):
+    cache.put_many("model", ["a", "b"], vectors(1, 2))
+
+    hits = cache.get_many("model", ["b", "missing", "a", "b"])
+
+    assert sorted(hits) == [0, 2, 3]
+    np.testing.assert_array_equal(hits[0], vectors(2)[0])
+    np.testing.assert_array_equal(hits[2], vectors(1)[0])
+    np.testing.assert_array_equal(hits[3], vectors(2)[0])
+    stats = cache.get_stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+def test_keys_are_scoped_to_the_model(cache):
+    cache.put_many("model-a", ["text"], vectors(1))
+
+    assert cache.get_many("model-b", ["text"]) == {}
+
+def test_vectors_round_trip_as_float32(cache):
+    vector = np.random.default_rng(0).random((1, 384))
+    cache.put_many("model", ["text"], vector)
+
+    hit = cache.get_many("model", ["text"])[0]
+
+    assert hit.dtype == np.float32
+    np.testing.assert_allclose(hit, vector[0].astype(np.float32))
+
+def test_put_many_counts_only_new_entries(cache):
+    cache.put_many("model", ["a", "b"], vectors(1, 2))
+    cache.put_many("model", ["b", "c"], vectors(2, 3))
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 3
+    assert stats["stores"] == 3
+
+def test_evicts_least_recently_used_over_the_cap(tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: next(clock))
+    cache = embedding_cache.EmbeddingCache(db_path=str(tmp_path / "embeddings.db"), max_entries=3)
+
+    cache.put_many("model", ["a", "b", "c"], vectors(1, 2, 3))
+    cache.get_many("model", ["a"])  # "b" is now the least recently used
+    cache.put_many("model", ["d"], vectors(4))
+
+    assert sorted(cache.get_many("model", ["a", "b", "c", "d"])) == [0, 2, 3]
+    stats = cache.get_stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 1
+
+def test_entry_count_survives_reopening(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    embedding_cache.EmbeddingCache(db_path=path, max_entries=100).put_many("model", ["a", "b"], vectors(1, 2))
+
+    assert embedding_cache.EmbeddingCache(db_path=path, max_entries=100).get_stats()["entries"] == 2
+
+def test_clear_empties_the_cache(cache):
+    cache.put_many("model", ["a"], vectors(1))
+    cache.clear()
+
+    assert cache.get_many("model", ["a"]) == {}
+    assert cache.get_stats()["entries"] == 0
@@ -0,0 +1,84 @@
+"""
+Tests for the embedding worker pool and when EmbeddingService uses it
+"""
+
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+embedding_workers = pytest.importorskip("app.services.embedding_workers")
+
+class FakeExecutor:
+    """Runs shards in-process; a broken one fails every submission like a pool whose worker died"""
+
+    def __init__(self, broken: bool):
+        self.broken = broken
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool("worker died"))
+        else:
+            texts = args[0]
+            future.set_result((1, np.full((len(texts), 2), len(texts), dtype=np.float32), 0.0))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+class FakeModel:
+    def embed(self, texts, batch_size=256):
+        for text in texts:
+            yield np.array([len(text), 0], dtype=np.float32)
+
+class FakeRegistry:
+    def get_model(self, model_name):
+        return FakeModel()
+
+def make_pool(monkeypatch, broken_pools: int):
+    executors = []
+
+    def new_executor(self):
+        executors.append(FakeExecutor(broken=len(executors) < broken_pools))
+        return executors[-1]
+
+    monkeypatch.setattr(embedding_workers.EmbeddingWorkerPool, "_new_executor", new_executor)
+    return embedding_workers.EmbeddingWorkerPool(workers=2, batch_size=2, threads_per_worker=1), executors
+
+def test_crashed_pool_is_restarted_and_the_batch_retried(monkeypatch):
+    pool, executors = make_pool(monkeypatch, broken_pools=1)
+
+    matrix = asyncio.run(pool.embed(["a", "bb", "ccc"]))
+
+    assert matrix.shape == (3, 2)
+    assert len(executors) == 2 and executors[0].shut_down
+    assert pool.get_stats()["crashes_total"] == 1
+    assert pool.get_stats()["restarts_total"] == 1
+
+def test_second_crash_fails_the_batch_but_leaves_a_fresh_pool(monkeypatch):
+    pool, executors = make_pool(monkeypatch, broken_pools=2)
+
+    with pytest.raises(Exception, match="Embedding worker crashed"):
+        asyncio.run(pool.embed(["a", "bb", "ccc"]))
+
+    assert len(executors) == 3 and not executors[-1].broken
+    assert asyncio.run(pool.embed(["a"])).shape == (1, 2)
+
+def test_service_with_workers_disabled_never_starts_the_pool(monkeypatch):
+    embedding_service = pytest.importorskip("app.services.embedding_service_optimized")
+    monkeypatch.setenv("EMBEDDING_PARALLEL_WORKERS", "2")
+    monkeypatch.setenv("EMBEDDING_PARALLEL_MIN_TEXTS", "1")
+    monkeypatch.setattr(embedding_service, "get_model_registry", lambda: FakeRegistry())
+    service = embedding_service.EmbeddingService()
+    service.settings.embedding_parallel_workers = 0
+
+    def no_pool():
+        raise AssertionError("worker pool requested although this service disabled it")
+
+    monkeypatch.setattr(embedding_service, "get_embedding_worker_pool", no_pool)
+
+    assert asyncio.run(service._embed_uncached(["a", "bb"])).shape == (2, 2)
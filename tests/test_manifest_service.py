@@ -0,0 +1,137 @@
+"""
+Tests for the per-tenant ingest manifest
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.query import DocumentMetadata
+
+manifest_service = pytest.importorskip("app.services.manifest_service")
+
+PARSER_VERSION = "3"
+MODEL = "model-a"
+MODIFIED = "2024-01-01T10:00:00.000Z"
+
+@pytest.fixture
+def manifest(tmp_path):
+    return manifest_service.ManifestService(db_path=str(tmp_path / "manifest.db"))
+
+def record(**overrides) -> DocumentMetadata:
+    fields = dict(
+        doc_id="file-1",
+        title="spec.pdf",
+        mime_type="application/pdf",
+        sha256="abc",
+        modified_at=manifest_service.parse_drive_time(MODIFIED),
+        drive_path="/spec.pdf",
+        page_count=3,
+        chunk_count=7,
+        md5_checksum="md5-1",
+        parser_version=PARSER_VERSION,
+        embedding_model=MODEL
+    )
+    fields.update(overrides)
+    return DocumentMetadata(**fields)
+
+def listed(**overrides) -> dict:
+    """A file as the Drive crawl lists it"""
+    file = {
+        "id": "file-1",
+        "name": "spec.pdf",
+        "web_view_link": None,
+        "md5_checksum": "md5-1",
+        "modified_time": MODIFIED
+    }
+    file.update(overrides)
+    return file
+
+def test_parse_drive_time_is_utc_aware():
+    parsed = manifest_service.parse_drive_time("2024-01-01T10:00:00.000Z")
+
+    assert parsed == datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+    assert manifest_service.parse_drive_time("2024-01-01T12:00:00+02:00") == parsed
+    assert manifest_service.parse_drive_time(None) is None
+    assert manifest_service.parse_drive_time("") is None
+
+def test_unchanged_when_md5_matches(manifest):
+    assert manifest.is_unchanged(record(), listed(), PARSER_VERSION, MODEL)
+
+def test_md5_wins_over_modified_time(manifest):
+    # Touched in Drive without a content change
+    assert manifest.is_unchanged(record(), listed(modified_time="2025-06-01T00:00:00Z"), PARSER_VERSION, MODEL)
+    # Content changed even though the modified time did not
+    assert not manifest.is_unchanged(record(), listed(md5_checksum="md5-2"), PARSER_VERSION, MODEL)
+
+def test_google_docs_fall_back_to_modified_time(manifest):
+    google_doc = record(md5_checksum=None)
+
+    assert manifest.is_unchanged(google_doc, listed(md5_checksum=None), PARSER_VERSION, MODEL)
+    assert not manifest.is_unchanged(
+        google_doc, listed(md5_checksum=None, modified_time="2024-01-02T10:00:00Z"), PARSER_VERSION, MODEL
+    )
+    assert not manifest.is_unchanged(google_doc, listed(md5_checksum=None, modified_time=None), PARSER_VERSION, MODEL)
+
+def test_changed_when_parser_or_model_differs(manifest):
+    assert not manifest.is_unchanged(record(), listed(), "2", MODEL)
+    assert not manifest.is_unchanged(record(), listed(), PARSER_VERSION, "model-b")
+
+def test_changed_when_there_is_no_record(manifest):
+    assert not manifest.is_unchanged(None, listed(), PARSER_VERSION, MODEL)
+    assert not manifest.is_current(None, PARSER_VERSION, MODEL)
+
+def test_put_and_load_round_trip(manifest):
+    manifest.put("tenant-a", record())
+    manifest.put("tenant-b", record(doc_id="file-2"))
+
+    loaded = manifest.load_tenant("tenant-a")
+
+    assert list(loaded) == ["file-1"]
+    stored = loaded["file-1"]
+    assert stored.sha256 == "abc"
+    assert stored.chunk_count == 7
+    assert stored.modified_at == record().modified_at
+    assert stored.ingested_at is not None and stored.ingested_at.tzinfo is not None
+    # A stored record still compares against a fresh listing
+    assert manifest.is_unchanged(stored, listed(md5_checksum=None), PARSER_VERSION, MODEL)
+
+def test_naive_times_are_stored_as_utc(manifest):
+    manifest.put("tenant", record(modified_at=datetime(2024, 1, 1, 10)))
+
+    stored = manifest.get("tenant", "file-1")
+
+    assert stored.modified_at == datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+    # Records from naive and aware inputs compare and sort together
+    later = manifest_service.parse_drive_time("2024-01-01T10:00:01Z")
+    assert sorted([later, stored.modified_at]) == [stored.modified_at, later]
+
+def test_put_replaces_the_record(manifest):
+    manifest.put("tenant", record())
+    manifest.put("tenant", record(sha256="def", chunk_count=9))
+
+    stored = manifest.get("tenant", "file-1")
+    assert (stored.sha256, stored.chunk_count) == ("def", 9)
+    assert manifest.get_stats()["documents_per_tenant"] == {"tenant": 1}
+
+def test_delete_and_clear(manifest):
+    manifest.put("tenant", record())
+    manifest.put("tenant", record(doc_id="file-2"))
+
+    manifest.delete("tenant", "file-1")
+    assert manifest.get("tenant", "file-1") is None
+    assert manifest.get("tenant", "file-2") is not None
+
+    manifest.clear("tenant")
+    assert manifest.load_tenant("tenant") == {}
+
+def test_listed_drive_path_prefers_the_web_link():
+    assert manifest_service.listed_drive_path(listed(web_view_link="https://drive/x")) == "https://drive/x"
+    assert manifest_service.listed_drive_path(listed()) == "/spec.pdf"
+
+def test_relocated_when_name_or_path_changes(manifest):
+    assert not manifest.is_relocated(record(), listed())
+    assert manifest.is_relocated(record(), listed(name="spec-v2.pdf"))
+    assert manifest.is_relocated(record(), listed(web_view_link="https://drive/x"))
+    # Content is still unchanged, so the file is skipped and only relocated
+    assert manifest.is_unchanged(record(), listed(name="spec-v2.pdf"), PARSER_VERSION, MODEL)
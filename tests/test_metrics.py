@@ -0,0 +1,104 @@
+"""
+Tests for the in-process histogram and stage timer
+"""
+
+from app.utils import metrics
+from app.utils.metrics import Histogram, StageTimer
+
+def test_histogram_buckets_are_inclusive_upper_bounds():
+    histogram = Histogram([10, 1, 5])
+    for value in [0.5, 1, 3, 5, 7, 10, 11, 1000]:
+        histogram.observe(value)
+
+    buckets = histogram.snapshot()["buckets"]
+
+    assert buckets == {"le_1": 2, "le_5": 2, "le_10": 2, "le_inf": 2}
+
+def test_histogram_tracks_count_sum_mean_min_and_max():
+    histogram = Histogram([10])
+    for value in [2, 4, 9]:
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["count"] == 3
+    assert snapshot["sum"] == 15
+    assert snapshot["mean"] == 5
+    assert snapshot["min"] == 2
+    assert snapshot["max"] == 9
+
+def test_empty_histogram_snapshot():
+    snapshot = Histogram([1, 2]).snapshot()
+
+    assert snapshot["count"] == 0
+    assert snapshot["mean"] == 0.0
+    assert snapshot["min"] is None
+    assert snapshot["max"] is None
+    assert sum(snapshot["buckets"].values()) == 0
+
+def test_histogram_reset_clears_observations():
+    histogram = Histogram([1])
+    histogram.observe(0.5)
+    histogram.observe(2)
+    histogram.reset()
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 0
+    assert snapshot["buckets"] == {"le_1": 0, "le_inf": 0}
+
+class FakeClock:
+    """perf_counter the tests advance by hand"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_stage_timer_accumulates_repeated_stages(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(metrics.time, "perf_counter", clock)
+    timer = StageTimer()
+
+    with timer.stage("embed"):
+        clock.now += 1.5
+    with timer.stage("embed"):
+        clock.now += 0.5
+    with timer.stage("upsert"):
+        clock.now += 0.25
+
+    assert timer.as_dict() == {"embed": 2.0, "upsert": 0.25}
+
+def test_stage_timer_records_time_when_the_block_raises(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(metrics.time, "perf_counter", clock)
+    timer = StageTimer()
+
+    try:
+        with timer.stage("download"):
+            clock.now += 3
+            raise RuntimeError("network")
+    except RuntimeError:
+        pass
+
+    assert timer.as_dict() == {"download": 3}
+
+def test_stage_timer_merge_adds_per_stage():
+    timer = StageTimer({"extract": 1.0})
+    timer.add("ocr", 2.0)
+    timer.merge({"extract": 0.5, "render": 0.25})
+
+    assert timer.as_dict() == {"extract": 1.5, "ocr": 2.0, "render": 0.25}
+
+def test_stage_timer_does_not_share_initial_dict():
+    initial = {"extract": 1.0}
+    timer = StageTimer(initial)
+    timer.add("extract", 1.0)
+
+    assert initial == {"extract": 1.0}
+
+def test_stage_timer_rounds_for_reporting():
+    timer = StageTimer()
+    timer.add("chunk", 0.1234567891)
+
+    assert timer.as_dict() == {"chunk": 0.123457}
@@ -0,0 +1,52 @@
+"""
+Tests for the persistent OCR results cache
+"""
+
+import pytest
+
+ocr_cache = pytest.importorskip("app.services.ocr_cache")
+
+@pytest.fixture
+def cache(tmp_path):
+    return ocr_cache.OCRCache(db_path=str(tmp_path / "ocr.db"), max_entries=100)
+
+def test_put_then_get_round_trips_the_result(cache):
+    key = cache.make_key("tesseract 5|psm 6", b"\x00\x01page")
+    cache.put(key, "page text", 0.8, "tesseract")
+
+    assert cache.get(key) == {"text": "page text", "confidence": 0.8, "engine": "tesseract"}
+    assert cache.get(cache.make_key("tesseract 5|psm 6", b"other page")) is None
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_key_depends_on_engine_config_and_raster():
+    key = ocr_cache.OCRCache.make_key("tesseract 5", b"raster")
+
+    assert key == ocr_cache.OCRCache.make_key("tesseract 5", bytearray(b"raster"))
+    assert key != ocr_cache.OCRCache.make_key("tesseract 4", b"raster")
+    assert key != ocr_cache.OCRCache.make_key("tesseract 5", b"raster2")
+
+def test_replacing_an_entry_does_not_grow_the_count(cache):
+    cache.put("key", "first", 0.8, "tesseract")
+    cache.put("key", "second", 0.8, "easyocr")
+
+    assert cache.get("key")["text"] == "second"
+    assert cache.get_stats()["entries"] == 1
+
+def test_evicts_least_recently_used_over_the_cap(tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(ocr_cache.time, "time", lambda: next(clock))
+    cache = ocr_cache.OCRCache(db_path=str(tmp_path / "ocr.db"), max_entries=2)
+
+    cache.put("a", "a", 0.8, "tesseract")
+    cache.put("b", "b", 0.8, "tesseract")
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", "c", 0.8, "tesseract")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
@@ -0,0 +1,71 @@
+"""
+Tests for page streaming through the parser pool
+"""
+
+import asyncio
+import tempfile
+
+import pytest
+
+parser_pool = pytest.importorskip("app.services.parser_pool")
+parser_service = pytest.importorskip("app.services.parser_service_optimized")
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    monkeypatch.setenv("CHUNK_SIZE", "100")
+    monkeypatch.setenv("OCR_CACHE_ENABLED", "false")
+    monkeypatch.setenv("PARSER_PAGE_WINDOW", "3")
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(parser_pool, "_worker_parser", parser_service.ParserService())
+
+    pool = parser_pool.ParserPool(workers=1, timeout_seconds=0, inline_max_bytes=64)
+
+    # Run worker functions in-process; whole-document parsing must not be used for streaming
+    async def call_in_process(filename, fn, *args):
+        result, _ = fn(*args)
+        return result
+
+    async def no_whole_document_parse(*args):
+        raise AssertionError("iter_pages parsed the whole document")
+
+    monkeypatch.setattr(pool, "_call", call_in_process)
+    monkeypatch.setattr(pool, "parse", no_whole_document_parse)
+    yield pool
+    pool.shutdown()
+
+def collect(pool, content, mime_type, limit=None):
+    async def run():
+        pages = []
+        async for page in pool.iter_pages(content, mime_type, "document"):
+            pages.append(page)
+            if limit is not None and len(pages) == limit:
+                break
+        return pages
+    return asyncio.run(run())
+
+def csv_content(rows: int) -> bytes:
+    return ("id,name\n" + "".join(f"{i},part {i}\n" for i in range(rows))).encode()
+
+def test_csv_pages_stream_without_a_whole_document_parse(pool):
+    content = csv_content(60)
+
+    pages = collect(pool, content, "text/csv")
+
+    expected = list(parser_service.ParserService().iter_pages(content, "text/csv", "document"))
+    assert len(pages) > pool.page_window
+    assert [page.text for page in pages] == [page.text for page in expected]
+    assert pool.windows_total == -(-len(pages) // pool.page_window)
+
+def test_text_pages_stream_without_a_whole_document_parse(pool):
+    content = ("line of text\n" * 2000).encode()
+
+    pages = collect(pool, content, "text/plain")
+
+    assert len(pages) > 1
+    assert "".join(page.text for page in pages).count("line of text") == 2000
+
+def test_large_inputs_and_spooled_pages_are_removed(pool, tmp_path):
+    collect(pool, csv_content(60), "text/csv")
+    collect(pool, csv_content(60), "text/csv", limit=1)
+
+    assert list(tmp_path.iterdir()) == []